@@ -0,0 +1,136 @@
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import PIL
+
+from src.api.api_client import DOWNSAMPLING_METHOD, NUMBER_OF_POINTS
+from src.api.fake_portals import synthetic_listings
+from src.generators.card_generator import BACKDROP_COLORS, CHART_SIZE, draw_card
+from src.generators.chart_generator import generate_chart_image
+from src.generators.encoding import DEFAULT_IMAGE_FORMAT, encode_image
+from src.generators.renderer import ASSET_DIR
+from src.utils.downsampling import downsample
+from src.utils.price_series import parse_market_activity, series_to_history, window_series
+
+# ----- Constants -----
+DEFAULT_SIZES = (80, 10_000, 1_000_000)
+DEFAULT_REPEAT = 5
+HISTORY_HOURS = 12
+# Slowdown against the baseline reported as a regression
+REGRESSION_THRESHOLD = 1.25
+BENCH_GIFT = "Plush Pepe"
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the parse, chart, card and encode hot paths on synthetic listings")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="listings per series")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per stage, after one warm-up run")
+    parser.add_argument("--format", default=DEFAULT_IMAGE_FORMAT, help="card image format to encode")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="median slowdown against the baseline that counts as a regression")
+    return parser.parse_args()
+
+def time_stage(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Run a stage once to warm up, then time it repeat times"""
+    fn()
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+def bench_size(size: int, repeat: int, image_format: str, now: float) -> Dict[str, Dict[str, float]]:
+    """Time every stage on one synthetic series, each stage fed by the output of the previous one"""
+    listings = synthetic_listings(BENCH_GIFT, HISTORY_HOURS, size / HISTORY_HOURS, now=now)
+    since_ms, until_ms = int((now - HISTORY_HOURS * 3600) * 1000), int(now * 1000)
+    series = parse_market_activity(listings)
+    window = window_series(series, since_ms, until_ms)
+    # The chart gets the whole series, to measure drawing dense data as well as the sampled 80 points
+    price_data = series_to_history(window)
+    chart = generate_chart_image(*CHART_SIZE, price_data)
+    dt = datetime.fromtimestamp(now, timezone.utc)
+    backdrop_name = BACKDROP_COLORS[0]["name"]
+    # An unknown gift name keeps the card off the network
+    card = draw_card("", 1000, chart, dt, asset_dir=ASSET_DIR, backdrop_name=backdrop_name)
+
+    stages: Dict[str, Callable[[], Any]] = {
+        "parse": lambda: parse_market_activity(listings),
+        "window": lambda: window_series(series, since_ms, until_ms),
+        "downsample": lambda: series_to_history(downsample(window, NUMBER_OF_POINTS, DOWNSAMPLING_METHOD)),
+        "chart": lambda: generate_chart_image(*CHART_SIZE, price_data),
+        "card": lambda: draw_card("", 1000, chart, dt, asset_dir=ASSET_DIR, backdrop_name=backdrop_name),
+        "encode": lambda: encode_image(card, image_format),
+    }
+    return {stage: time_stage(fn, repeat) for stage, fn in stages.items()}
+
+def git_revision() -> Optional[str]:
+    """Current commit, to tell result files apart"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def find_regressions(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Describe every stage whose median got slower than threshold times the baseline"""
+    regressions: List[str] = []
+    for size, stages in results["results"].items():
+        for stage, timing in stages.items():
+            before = baseline["results"].get(size, {}).get(stage)
+            if before and before["median_ms"] > 0 and timing["median_ms"] > before["median_ms"] * threshold:
+                ratio = timing["median_ms"] / before["median_ms"]
+                regressions.append(f"{stage} @ {size}: {before['median_ms']:.2f}ms -> {timing['median_ms']:.2f}ms ({ratio:.2f}x)")
+    return regressions
+
+def main() -> None:
+    """Main application entry point."""
+    args = parse_args()
+    now = time.time()
+
+    results: Dict[str, Any] = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pillow": PIL.__version__,
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "format": args.format,
+        "results": {},
+    }
+    for size in args.sizes:
+        print(f"Benchmarking {size} listings...", file=sys.stderr)
+        results["results"][str(size)] = bench_size(size, args.repeat, args.format, now)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = find_regressions(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import json
+
+from src.api.fake_portals import DEFAULT_HOST, DEFAULT_PORT, HISTORY_HOURS, LISTINGS_PER_HOUR, FakePortalsServer
+
+# ----- Constants -----
+GIFTS_JSON_PATH = "src/config/gifts.json"
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Portals market API")
+    parser.add_argument("--mode", choices=("synthetic", "replay", "capture"), default="synthetic",
+                        help="serve generated listings, replay captures, or proxy and record the real API")
+    parser.add_argument("--capture-dir", help="directory captures are read from or written to")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency of up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--history-hours", type=float, default=HISTORY_HOURS, help="synthetic history length")
+    parser.add_argument("--listings-per-hour", type=float, default=LISTINGS_PER_HOUR, help="synthetic listing density")
+    parser.add_argument("--item-padding", type=int, default=0, help="extra bytes per synthetic item")
+    parser.add_argument("--gifts-json", default=GIFTS_JSON_PATH, help="gifts reported by the synthetic floors endpoint")
+    return parser.parse_args()
+
+async def serve(args: argparse.Namespace) -> None:
+    """Run the fake server until interrupted."""
+    with open(args.gifts_json, "r") as f:
+        gift_names = list(json.load(f).values())
+
+    server = FakePortalsServer(
+        mode=args.mode,
+        capture_dir=args.capture_dir,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        history_hours=args.history_hours,
+        listings_per_hour=args.listings_per_hour,
+        item_padding=args.item_padding,
+        gift_names=gift_names,
+    )
+    api_url = await server.start(args.host, args.port)
+    print(f"Fake Portals API ({args.mode}) listening, use PORTALS_API_URL={api_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+def main() -> None:
+    """Main application entry point."""
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from src.api.api_client import DEFAULT_TIME_RANGE, TIME_RANGES, close_client, configure_api_url
+from src.api.auth_manager import AuthManager
+from src.api.fake_auth import fake_auth_enabled, fake_update_auth
+from src.api.ingestion import SWEEP_CONCURRENCY, get_stored_chart_data, sweep_market
+from src.database.database import init_db
+from src.generators.card_inputs import CardInputs, card_inputs, range_time_label_format
+from src.generators.encoding import DEFAULT_IMAGE_FORMAT, DEFAULT_PNG_COMPRESS_LEVEL, DEFAULT_QUALITY, IMAGE_FORMATS, image_filename
+from src.generators.fonts import font_report
+from src.generators.renderer import RENDER_WORKERS, CardRenderer
+from src.utils.gift_catalog import get_catalog
+from src.utils.gift_image_utils import prefetch_gift_images
+
+# ----- Constants -----
+OUTPUT_DIR = "cards"
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Render a price card for every gift in one run")
+    parser.add_argument("gifts", nargs="*", help="gifts to render, defaults to every gift in the catalog")
+    parser.add_argument("--range", choices=tuple(TIME_RANGES), default=DEFAULT_TIME_RANGE, help="chart time range")
+    parser.add_argument("--out-dir", default=OUTPUT_DIR, help="directory the cards are written to")
+    parser.add_argument("--format", choices=tuple(IMAGE_FORMATS), default=DEFAULT_IMAGE_FORMAT, help="card image format")
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY, help="JPEG/WebP quality")
+    parser.add_argument("--compress-level", type=int, default=DEFAULT_PNG_COMPRESS_LEVEL, help="PNG zlib level")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS, help="render processes, 0 renders in a thread")
+    parser.add_argument("--concurrency", type=int, default=SWEEP_CONCURRENCY, help="gifts fetched at once")
+    return parser.parse_args()
+
+async def fetch_all(
+    gift_names: List[str],
+    auth_manager: AuthManager,
+    time_range: str,
+    concurrency: int,
+) -> Dict[str, CardInputs]:
+    """Sweep the market once and read every gift's chart data from the store"""
+    try:
+        await sweep_market(gift_names, auth_manager, concurrency=concurrency)
+    except Exception as e:
+        # Cards are still rendered from whatever the store already has
+        print(f"Error sweeping the market: {e}")
+
+    async def read(gift_name: str) -> Optional[CardInputs]:
+        try:
+            history, current_price = await get_stored_chart_data(gift_name, auth_manager, time_range=time_range)
+        except Exception as e:
+            print(f"Error reading {gift_name}: {e}")
+            return None
+        if not history or current_price is None:
+            print(f"Skipping {gift_name}: no price data")
+            return None
+        return card_inputs(history, float(current_price))
+
+    results = await asyncio.gather(*(read(gift_name) for gift_name in gift_names))
+    return {gift_name: inputs for gift_name, inputs in zip(gift_names, results) if inputs is not None}
+
+async def render_all(
+    renderer: CardRenderer,
+    inputs: Dict[str, CardInputs],
+    time_range: str,
+) -> Dict[str, bytes]:
+    """Render every card at once across the render pool"""
+    now = datetime.now(timezone.utc)
+    time_label_format = range_time_label_format(time_range)
+
+    async def render(gift_name: str, card: CardInputs) -> Optional[bytes]:
+        price_data, price_stars, percent_change = card
+        try:
+            return await renderer.render_card(gift_name, price_data, price_stars, percent_change, now, time_label_format)
+        except Exception as e:
+            print(f"Error rendering {gift_name}: {e}")
+            return None
+
+    names = list(inputs)
+    results = await asyncio.gather(*(render(gift_name, inputs[gift_name]) for gift_name in names))
+    return {gift_name: image for gift_name, image in zip(names, results) if image}
+
+def write_all(cards: Dict[str, bytes], out_dir: str, image_format: str) -> None:
+    """Write every rendered card to the output directory"""
+    os.makedirs(out_dir, exist_ok=True)
+    for gift_name, image in cards.items():
+        with open(os.path.join(out_dir, image_filename(gift_name, image_format)), "wb") as f:
+            f.write(image)
+
+async def run(args: argparse.Namespace) -> None:
+    """Fetch, render and write every card, timing each stage."""
+    load_dotenv()
+    configure_api_url()
+    init_db()
+
+    catalog = get_catalog()
+    gift_names = [catalog.canonical_name(name) or name for name in args.gifts] or list(catalog.names)
+    auth_manager = AuthManager(
+        int(os.getenv("API_ID", "0")),
+        os.getenv("API_HASH", ""),
+        update_auth=fake_update_auth if fake_auth_enabled() else None,
+    )
+    renderer = CardRenderer(
+        workers=args.workers,
+        image_format=args.format,
+        quality=args.quality,
+        compress_level=args.compress_level,
+    )
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    def lap(stage: str, stage_started: float) -> float:
+        timings[stage] = time.perf_counter() - stage_started
+        return time.perf_counter()
+
+    try:
+        print(font_report())
+        stage_started = time.perf_counter()
+        await auth_manager.get()
+        stage_started = lap("auth", stage_started)
+
+        # Gift art is cached on disk first so every render worker loads it once at start
+        await prefetch_gift_images(catalog.ids)
+        await renderer.start()
+        stage_started = lap("warm-up", stage_started)
+
+        inputs = await fetch_all(gift_names, auth_manager, args.range, args.concurrency)
+        stage_started = lap("fetch", stage_started)
+
+        cards = await render_all(renderer, inputs, args.range)
+        stage_started = lap("render", stage_started)
+
+        write_all(cards, args.out_dir, args.format)
+        lap("write", stage_started)
+    finally:
+        await close_client()
+        await renderer.stop()
+
+    print(f"Rendered {len(cards)}/{len(gift_names)} cards to {args.out_dir}")
+    for stage, seconds in timings.items():
+        print(f"{stage:>8}: {seconds:.2f}s")
+    print(f"{'total':>8}: {time.perf_counter() - started:.2f}s")
+
+def main() -> None:
+    """Main application entry point."""
+    asyncio.run(run(parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-from src.api.api_client import get_price_history, get_current_price, get_auth_data, PriceData as ApiPriceData
+from src.api.api_client import get_price_history, get_current_price, get_auth_data, configure_api_url, PriceData as ApiPriceData
+from src.api.fake_auth import fake_auth_data, fake_auth_enabled
 from src.generators.chart_generator import generate_chart_image, PriceData as ChartPriceData
-from src.generators.card_generator import draw_card
+from src.generators.card_generator import CHART_SIZE, draw_card
 import os
 from dotenv import load_dotenv
 from datetime import datetime, timezone
@@ -28,10 +29,6 @@ GIFTS_JSON_PATH = "src/config/gifts.json"
 # Date format
 DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
 
-# Chart dimensions
-CHART_WIDTH = 1500
-CHART_HEIGHT = 220
-
 # ----- Gift name mappings -----
 GIFT_NAME_MAP: Dict[str, str] = {
     # Jack in the Box variations
@@ -277,13 +274,16 @@ def main() -> None:
     """Main application entry point."""
     # ----- Load environment variables -----
     load_dotenv()
-    
-    api_id = int(get_env_var(ENV_VARS["API_ID"]))
-    api_hash = get_env_var(ENV_VARS["API_HASH"])
-    phone_number = get_env_var(ENV_VARS["PHONE_NUMBER"])
+    configure_api_url()
 
     # ----- Get authentication data -----
-    auth_data = get_auth_data(api_id, api_hash)
+    # With PORTALS_FAKE_AUTH the run needs no Telegram credentials (use with bin/fake_portals.py)
+    if fake_auth_enabled():
+        auth_data = fake_auth_data()
+    else:
+        api_id = int(get_env_var(ENV_VARS["API_ID"]))
+        api_hash = get_env_var(ENV_VARS["API_HASH"])
+        auth_data = get_auth_data(api_id, api_hash)
     if not auth_data:
         print("Error: Failed to get auth data")
         sys.exit(1)
@@ -324,7 +324,7 @@ def main() -> None:
     # ----- Generate price chart -----
     chart_data = convert_price_data(api_data)
     max_price = float(max(item["priceUsd"] for item in chart_data)) if chart_data else 0.0
-    chart_img = generate_chart_image(CHART_WIDTH, CHART_HEIGHT, chart_data)
+    chart_img = generate_chart_image(CHART_SIZE[0], CHART_SIZE[1], chart_data)
     if chart_img is None:
         print("Error: Failed to generate chart image")
         sys.exit(1)
@@ -7,11 +7,17 @@ setup(
     install_requires=[
         'aiogram>=3.0.0',
         'python-dotenv>=0.19.0',
-        'Pillow>=8.3.1',
+        'Pillow>=10.1.0',
+        'numpy>=1.24.3',
         'requests>=2.26.0',
         'pyrogram>=2.0.0',
         'portalsmp>=1.0.0',
+        'curl_cffi>=0.5.10',
     ],
+    extras_require={
+        # Offline Portals server (bin/fake_portals.py) and the benchmarks built on it
+        'dev': ['aiohttp>=3.8.0'],
+    },
     author="Th3ryks",
     author_email="",
     description="A Telegram bot for generating beautiful gift charts and statistics",
@@ -1,21 +1,87 @@
 import portalsmp.portalsapi as portalsapi
+from curl_cffi.requests import AsyncSession
+from curl_cffi.requests.exceptions import RequestException
 from datetime import datetime, timezone, timedelta
+from urllib.parse import quote_plus
 import asyncio
-from typing import List, Dict, Union, Optional, TypedDict
+import os
+import numpy as np
+from typing import Any, AsyncIterator, Iterator, List, Dict, Tuple, Union, Optional, TypedDict, cast
+
+from src.api.auth_manager import AuthManager
+from src.api.resilience import AIMDLimiter, CircuitBreaker, RetryableError, UpstreamGuard
+from src.utils.cache import TTLCache
+from src.utils.downsampling import downsample
+from src.utils.price_series import PriceSeries, empty_series, parse_market_activity, window_series, series_to_history
+from src.utils.singleflight import SingleFlight
 
 # ----- Constants -----
+# Base URL of the Portals API; set PORTALS_API_URL to use a local fake server
+PORTALS_API_URL = portalsapi.API_URL
+API_URL = PORTALS_API_URL
 PRICE_HISTORY_LIMIT = 1000000
+STREAM_PAGE_SIZE = 500
+# Incremental refreshes start small; pages double while they are entirely new
+STREAM_FIRST_PAGE_SIZE = 50
 DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
 HOURS_TO_FETCH = 12
 NUMBER_OF_POINTS = 80
+DOWNSAMPLING_METHOD = "lttb"
 HOURS_INTERVAL = HOURS_TO_FETCH / (NUMBER_OF_POINTS - 1)
 
+# Supported chart ranges and their length in hours
+DEFAULT_TIME_RANGE = "12h"
+TIME_RANGES: Dict[str, float] = {
+    "1h": 1,
+    "12h": HOURS_TO_FETCH,
+    "24h": 24,
+    "7d": 7 * 24,
+    "30d": 30 * 24,
+}
+
+# ----- Async client settings -----
+REQUEST_TIMEOUT = 15
+MAX_CONNECTIONS = 10
+MAX_CONCURRENT_REQUESTS = 8
+IMPERSONATE = "chrome110"
+AUTH_ERROR_STATUS_CODES = (401, 403)
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# ----- Result cache settings -----
+HISTORY_CACHE_TTL = 60
+CURRENT_PRICE_CACHE_TTL = 30
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
 # ----- Type Aliases -----
 class PriceData(TypedDict):
     priceUsd: float
     listed_at: str
 
 PriceHistory = List[PriceData]
+ChartData = Tuple[PriceHistory, Optional[float]]
+AuthData = Union[str, AuthManager]
+
+class PortalsAuthError(Exception):
+    """Raised when Portals rejects the auth data"""
+
+def configure_api_url(url: Optional[str] = None) -> str:
+    """
+    Point all Portals calls at a base URL.
+    
+    Args:
+        url: Base URL ending in /api/, defaults to PORTALS_API_URL from the
+            environment or the real Portals API
+            
+    Returns:
+        The base URL now in use
+    """
+    global API_URL
+    API_URL = url or os.getenv("PORTALS_API_URL") or PORTALS_API_URL
+    # The sync portalsapi helpers read their own module-level URL
+    portalsapi.API_URL = API_URL
+    return API_URL
+
+configure_api_url()
 
 def get_auth_data(api_id: int, api_hash: str) -> Optional[str]:
     """Get authentication data for the Portals API"""
@@ -25,6 +91,258 @@ def get_auth_data(api_id: int, api_hash: str) -> Optional[str]:
         print(f"Error getting auth data: {e}")
         return None
 
+class PortalsClient:
+    """
+    Async Portals market client.
+
+    Keeps one pooled keep-alive session for all requests and applies a
+    per-request timeout. Every request goes through an UpstreamGuard: transient
+    failures are retried with jittered backoff, an adaptive limit bounds the
+    requests in flight and a circuit breaker fails fast while Portals is down.
+    """
+
+    def __init__(
+        self,
+        timeout: float = REQUEST_TIMEOUT,
+        max_connections: int = MAX_CONNECTIONS,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        guard: Optional[UpstreamGuard] = None,
+    ):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.guard = guard or UpstreamGuard(
+            breaker=CircuitBreaker(),
+            limiter=AIMDLimiter(initial_limit=min(4, max_concurrency), max_limit=max_concurrency),
+        )
+        self._session: Optional[AsyncSession] = None
+
+    def _get_session(self) -> AsyncSession:
+        # Created lazily so the session binds to the running event loop
+        if self._session is None:
+            self._session = AsyncSession(
+                impersonate=IMPERSONATE,
+                timeout=self.timeout,
+                max_clients=self.max_connections,
+            )
+        return self._session
+
+    async def market_activity(
+        self,
+        sort: str = "latest",
+        offset: int = 0,
+        limit: int = 20,
+        activity_type: str = "",
+        gift_name: str = "",
+        auth_data: "AuthData" = "",
+    ) -> Any:
+        """
+        Async equivalent of portalsapi.marketActivity using the pooled session.
+        When auth_data is an AuthManager, rejected credentials are refreshed
+        and the request is retried once.
+        """
+        if auth_data == "":
+            raise Exception("market_activity(): Error: auth_data is required")
+
+        url = f"{API_URL}market/actions/?offset={offset}&limit={limit}{portalsapi.SORTS[sort]}"
+        if gift_name:
+            url += f"&filter_by_collections={quote_plus(portalsapi.cap(gift_name))}"
+        if activity_type:
+            url += f"&action_types={activity_type}"
+
+        data = await self._get_authed(url, auth_data)
+        return data["actions"] if isinstance(data, dict) and "actions" in data else data
+
+    async def gifts_floors(self, auth_data: "AuthData" = "") -> Dict[str, float]:
+        """
+        Async equivalent of portalsapi.giftsFloors: the floor price of every
+        collection in one request, keyed by short name (see portalsapi.toShortName).
+        """
+        if auth_data == "":
+            raise Exception("gifts_floors(): Error: auth_data is required")
+
+        data = await self._get_authed(f"{API_URL}collections/floors", auth_data)
+        floors = data.get("floorPrices") if isinstance(data, dict) else None
+        return {short_name: float(price) for short_name, price in (floors or {}).items() if price is not None}
+
+    async def _get_authed(self, url: str, auth_data: "AuthData") -> Any:
+        # With an AuthManager, rejected credentials are refreshed and retried once
+        if not isinstance(auth_data, AuthManager):
+            return await self._get_json(url, auth_data)
+
+        token = await auth_data.get()
+        try:
+            return await self._get_json(url, token)
+        except PortalsAuthError:
+            token = await auth_data.refresh(stale=token)
+            return await self._get_json(url, token)
+
+    async def _get_json(self, url: str, auth_data: str) -> Any:
+        headers = dict(portalsapi.HEADERS)
+        headers["Authorization"] = auth_data
+
+        async def attempt() -> Any:
+            try:
+                response = await self._get_session().get(url, headers=headers)
+            except RequestException as e:
+                raise RetryableError(f"_get_json(): Error: {e}") from e
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                raise RetryableError(f"_get_json(): Error: status_code: {response.status_code}, response_text: {response.text}")
+            return response
+
+        response = await self.guard.call(attempt)
+        if response.status_code in AUTH_ERROR_STATUS_CODES:
+            raise PortalsAuthError(f"_get_json(): Error: status_code: {response.status_code}, response_text: {response.text}")
+        if response.status_code != 200:
+            raise Exception(f"_get_json(): Error: status_code: {response.status_code}, response_text: {response.text}")
+
+        # Large responses are decoded off the event loop
+        return await asyncio.to_thread(response.json)
+
+    async def close(self) -> None:
+        """Close the pooled session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+_default_client: Optional[PortalsClient] = None
+
+# Concurrent async fetches for the same gift share one upstream call
+_inflight = SingleFlight()
+
+# Recent history and current price results, shared with the ingestion layer
+result_cache = TTLCache(max_bytes=CACHE_MAX_BYTES)
+
+def get_client() -> PortalsClient:
+    """Get the shared async Portals client"""
+    global _default_client
+    if _default_client is None:
+        _default_client = PortalsClient()
+    return _default_client
+
+async def close_client() -> None:
+    """Close the shared async Portals client"""
+    global _default_client
+    if _default_client is not None:
+        await _default_client.close()
+        _default_client = None
+
+def _extract_current_price(result: Any) -> Optional[float]:
+    """Extract the price of the first listing in a marketActivity response"""
+    if isinstance(result, list) and len(result) > 0:
+        return float(result[0]["price"]) if result[0].get("price") else None
+    return None
+
+def range_hours(time_range: str) -> float:
+    """Get the length in hours of a chart range, falling back to the default range"""
+    return TIME_RANGES.get(time_range, TIME_RANGES[DEFAULT_TIME_RANGE])
+
+def _window_bounds_ms(hours: float = HOURS_TO_FETCH) -> Tuple[int, int]:
+    """Epoch ms bounds of the last given number of hours"""
+    now = datetime.now(timezone.utc)
+    chart_time = now - timedelta(hours=hours)
+    return int(chart_time.timestamp() * 1000), int(now.timestamp() * 1000)
+
+def _cut_page(page: Any, since_ms: int, page_size: int) -> Tuple[PriceSeries, bool]:
+    """
+    Cut a newest-first marketActivity page at since_ms.
+    Returns the listings inside the window and whether paging should stop.
+    """
+    if isinstance(page, str):
+        print(f"Error: API returned string instead of list: {page}")
+        return empty_series(), True
+    if not isinstance(page, list):
+        print(f"Error: API returned unexpected type: {type(page)}")
+        return empty_series(), True
+    if not page:
+        return empty_series(), True
+
+    timestamps, prices = parse_market_activity(page)
+    inside = timestamps >= since_ms
+    done = not bool(inside.all()) or len(page) < page_size
+    return (timestamps[inside], prices[inside]), done
+
+def iter_listings(
+    gift_name: str,
+    auth_data: str,
+    since_ms: int,
+    page_size: int = STREAM_PAGE_SIZE,
+    max_listings: int = PRICE_HISTORY_LIMIT
+) -> Iterator[PriceSeries]:
+    """
+    Stream listings for a gift newest first, one page at a time.
+    Stops at the first listing older than since_ms.
+    """
+    offset = 0
+    while offset < max_listings:
+        page = portalsapi.marketActivity(
+            sort="latest",
+            offset=offset,
+            activityType="listing",
+            limit=page_size,
+            gift_name=gift_name,
+            authData=auth_data
+        )
+        series, done = _cut_page(page, since_ms, page_size)
+        if len(series[0]):
+            yield series
+        if done:
+            return
+        offset += page_size
+
+async def stream_listings(
+    gift_name: str,
+    auth_data: AuthData,
+    since_ms: int,
+    client: Optional[PortalsClient] = None,
+    page_size: int = STREAM_PAGE_SIZE,
+    max_listings: int = PRICE_HISTORY_LIMIT,
+    first_page_size: int = STREAM_FIRST_PAGE_SIZE
+) -> AsyncIterator[PriceSeries]:
+    """
+    Stream listings for a gift newest first, yielding each page as it arrives.
+    Stops at the first listing older than since_ms, so the amount fetched
+    depends on the window size rather than the gift's whole listing history.
+    The first page holds first_page_size listings and each following page
+    doubles up to page_size, so a refresh a few seconds after the last one
+    costs a single small page.
+    """
+    client = client or get_client()
+    offset = 0
+    limit = min(first_page_size, page_size)
+    while offset < max_listings:
+        page = await client.market_activity(
+            sort="latest",
+            offset=offset,
+            limit=limit,
+            activity_type="listing",
+            gift_name=gift_name,
+            auth_data=auth_data
+        )
+        series, done = _cut_page(page, since_ms, limit)
+        if len(series[0]):
+            yield series
+        if done:
+            return
+        offset += limit
+        limit = min(limit * 2, page_size)
+
+def _build_history(chunks: List[PriceSeries], since_ms: int, until_ms: int) -> PriceHistory:
+    """Turn streamed chunks into the sampled chart window"""
+    if not chunks:
+        print("No data points found in the specified time range")
+        return []
+
+    series = window_series(
+        (np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks])),
+        since_ms,
+        until_ms
+    )
+    if len(series[0]) == 0:
+        print("No data points found in the specified time range")
+        return []
+
+    return cast(PriceHistory, series_to_history(downsample(series, NUMBER_OF_POINTS, DOWNSAMPLING_METHOD)))
+
 def get_current_price(gift_name: str, auth_data: Optional[str]) -> Optional[float]:
     """Get current price for a gift"""
     if auth_data is None:
@@ -39,74 +357,59 @@ def get_current_price(gift_name: str, auth_data: Optional[str]) -> Optional[floa
             gift_name=gift_name,
             authData=auth_data
         )
-        if isinstance(result, list) and len(result) > 0:
-            return float(result[0]["price"]) if result[0].get("price") else None
-        return None
+        return _extract_current_price(result)
     except Exception as e:
         print(f"Error getting current price: {e}")
         return None
 
-def get_price_history(gift_name: str, auth_data: Optional[str], time_range: str = "12h") -> PriceHistory:
+def get_price_history(gift_name: str, auth_data: Optional[str], time_range: str = DEFAULT_TIME_RANGE) -> PriceHistory:
     """
     Get price history for a gift from the Portals API.
-    Always returns 12-hour history with 5 points.
+    Returns the history of the given range with at most NUMBER_OF_POINTS points.
     """
     if auth_data is None:
         print("Error: auth_data is None")
         return []
-        
+
     try:
-        # ----- Fetch market activity data -----
-        results = portalsapi.marketActivity(
+        since_ms, until_ms = _window_bounds_ms(range_hours(time_range))
+        chunks = list(iter_listings(gift_name, auth_data, since_ms))
+        return _build_history(chunks, since_ms, until_ms)
+    except Exception as e:
+        print(f"Error fetching price history: {e}")
+        return []
+
+async def get_current_price_async(
+    gift_name: str,
+    auth_data: Optional[AuthData],
+    client: Optional[PortalsClient] = None,
+    use_cache: bool = True
+) -> Optional[float]:
+    """Get current price for a gift without blocking the event loop"""
+    if auth_data is None:
+        print("Error: auth_data is None")
+        return None
+
+    async def fetch() -> Optional[float]:
+        result = await (client or get_client()).market_activity(
             sort="price_asc",
-            activityType="listing",
-            limit=PRICE_HISTORY_LIMIT,
+            activity_type="listing",
+            limit=1,
             gift_name=gift_name,
-            authData=auth_data
+            auth_data=auth_data
         )
-        
-        if isinstance(results, str):
-            print(f"Error: API returned string instead of list: {results}")
-            return []
-        if not isinstance(results, list):
-            print(f"Error: API returned unexpected type: {type(results)}")
-            return []
-        
-        now = datetime.now(timezone.utc)
-        chart_time = now - timedelta(hours=HOURS_TO_FETCH)
-        
-        print(f"Current time: {now}")
-        print(f"Filtering data between {chart_time} and {now}")
-        
-        all_data: List[PriceData] = []
-        
-        for item in results:
-            try:
-                listed_at = datetime.strptime(str(item["listed_at"]), DATE_FORMAT).replace(tzinfo=timezone.utc)
-                if listed_at >= chart_time and listed_at <= now:
-                    all_data.append({
-                        "priceUsd": float(item["price"]),
-                        "listed_at": item["listed_at"]
-                    })
-            except (ValueError, KeyError) as e:
-                print(f"Error processing data point: {e}")
-                continue
-        
-        if not all_data:
-            print("No data points found in the specified time range")
-            return []
-            
-        all_data.sort(key=lambda x: datetime.strptime(str(x["listed_at"]), DATE_FORMAT))
-        
-        if len(all_data) > NUMBER_OF_POINTS:
-            step = len(all_data) // NUMBER_OF_POINTS
-            filtered_data = [all_data[i] for i in range(0, len(all_data), step)]
-            if len(filtered_data) > NUMBER_OF_POINTS:
-                filtered_data = filtered_data[:NUMBER_OF_POINTS]
-            return filtered_data
-        
-        return all_data
-        
+        return _extract_current_price(result)
+
+    key = ("current_price", gift_name)
+    cached = result_cache.get(key) if use_cache else None
+    if cached is not None:
+        return cached
+
+    try:
+        price = await _inflight.do(key, fetch)
+        if price is not None:
+            result_cache.set(key, price, ttl=CURRENT_PRICE_CACHE_TTL)
+        return price
     except Exception as e:
-        print(f"Error fetching price history: {e}")
-        return []
\ No newline at end of file
+        print(f"Error getting current price: {e}")
+        return None
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Optional
+
+import portalsmp.portalsapi as portalsapi
+
+# ----- Constants -----
+AUTH_TTL_SECONDS = 60 * 60
+REFRESH_MARGIN_SECONDS = 5 * 60
+RETRY_DELAY_SECONDS = 30
+AUTH_DATE_PATTERN = re.compile(r"auth_date=(\d+)")
+
+def parse_auth_date(auth_data: str) -> Optional[float]:
+    """
+    Get the issue time of Telegram WebApp auth data.
+    
+    Args:
+        auth_data: Auth data string returned by update_auth
+        
+    Returns:
+        Unix timestamp of auth_date, or None if it is missing
+    """
+    match = AUTH_DATE_PATTERN.search(auth_data)
+    return float(match.group(1)) if match else None
+
+class AuthManager:
+    """
+    Owns the Portals auth data for the whole process.
+    
+    Auth data is fetched with the async update_auth, its expiry is tracked
+    from auth_date, and a background task refreshes it before it expires.
+    Callers that hit an auth failure ask for a refresh and retry once.
+    """
+
+    def __init__(
+        self,
+        api_id: int,
+        api_hash: str,
+        ttl: float = AUTH_TTL_SECONDS,
+        refresh_margin: float = REFRESH_MARGIN_SECONDS,
+        retry_delay: float = RETRY_DELAY_SECONDS,
+        update_auth: Optional[Callable[[int, str], Awaitable[str]]] = None,
+    ):
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        # Defaults to portalsapi.update_auth; the fake server supplies an offline one
+        self._update_auth = update_auth or portalsapi.update_auth
+        self._auth_data: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def expires_at(self) -> float:
+        """Unix time at which the current auth data is considered expired"""
+        return self._expires_at
+
+    def is_valid(self) -> bool:
+        """Check whether auth data is loaded and not expired"""
+        return self._auth_data is not None and time.time() < self._expires_at
+
+    async def get(self) -> str:
+        """Get valid auth data, refreshing it first if missing or expired"""
+        if self.is_valid():
+            return self._auth_data  # type: ignore[return-value]
+        return await self.refresh(stale=self._auth_data)
+
+    async def refresh(self, stale: Optional[str] = None) -> str:
+        """
+        Fetch new auth data.
+        
+        Args:
+            stale: Auth data the caller found to be rejected; if it was already
+                replaced by a concurrent refresh, the newer one is returned
+                without another update_auth call
+                
+        Returns:
+            Fresh auth data
+        """
+        async with self._lock:
+            if self._auth_data is not None and self._auth_data != stale and self.is_valid():
+                return self._auth_data
+            auth_data = await self._update_auth(self.api_id, self.api_hash)
+            if not auth_data:
+                raise Exception("update_auth returned no auth data")
+            issued_at = parse_auth_date(auth_data) or time.time()
+            self._auth_data = auth_data
+            self._expires_at = issued_at + self.ttl
+            logging.info("Portals auth data refreshed")
+            return auth_data
+
+    def start(self) -> None:
+        """Start refreshing auth data in the background before it expires"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop background refreshing"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            # Never refresh more often than retry_delay, even if auth_date is stale
+            delay = self._expires_at - self.refresh_margin - time.time()
+            await asyncio.sleep(max(delay, self.retry_delay))
+            try:
+                await self.refresh(stale=self._auth_data)
+            except Exception as e:
+                logging.error(f"Error refreshing auth data: {e}")
+                await asyncio.sleep(self.retry_delay)
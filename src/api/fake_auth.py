@@ -0,0 +1,18 @@
+import os
+import time
+from typing import Any
+
+# ----- Constants -----
+FAKE_AUTH_ENV = "PORTALS_FAKE_AUTH"
+
+def fake_auth_enabled() -> bool:
+    """Check whether PORTALS_FAKE_AUTH asks for offline auth data instead of a Telegram login"""
+    return os.getenv(FAKE_AUTH_ENV, "").lower() in ("1", "true", "yes")
+
+def fake_auth_data() -> str:
+    """Build WebApp-style auth data that the fake server accepts and AuthManager can date"""
+    return f"tma query_id=offline&user=%7B%22id%22%3A0%7D&auth_date={int(time.time())}&hash=offline"
+
+async def fake_update_auth(api_id: Any = None, api_hash: Any = None) -> str:
+    """Drop-in for portalsapi.update_auth that never contacts Telegram"""
+    return fake_auth_data()
@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from aiohttp import web
+from curl_cffi.requests import AsyncSession
+
+import portalsmp.portalsapi as portalsapi
+
+# ----- Constants -----
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8787
+API_PREFIX = "/api/"
+UPSTREAM_API_URL = portalsapi.API_URL
+LISTED_AT_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+# Synthetic market defaults
+HISTORY_HOURS = 30 * 24
+LISTINGS_PER_HOUR = 20
+BASE_PRICE_RANGE = (2.0, 200.0)
+PRICE_VOLATILITY = 0.01
+MAX_PAGE_SIZE = 1_000_000
+FLOOR_LISTINGS = 20
+
+# Query sort values mapped to (item field, descending)
+SORT_FIELDS = {
+    "listed_at desc": ("listed_at", True),
+    "price asc": ("price", False),
+    "price desc": ("price", True),
+}
+
+def capture_key(path: str, query: Dict[str, str]) -> str:
+    """Stable file name for a request, ignoring auth and parameter order"""
+    canonical = path + "?" + "&".join(f"{k}={query[k]}" for k in sorted(query))
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+def synthetic_listings(
+    gift_name: str,
+    history_hours: float = HISTORY_HOURS,
+    listings_per_hour: float = LISTINGS_PER_HOUR,
+    now: Optional[float] = None,
+    item_padding: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Generate a deterministic random-walk listing history for a gift.
+
+    The same gift name always yields the same prices, so runs can be compared;
+    timestamps are spread evenly over the history ending at now.
+
+    Args:
+        gift_name: Gift the listings belong to (also seeds the generator)
+        history_hours: How far back the history reaches
+        listings_per_hour: Listing density
+        now: End of the history as a Unix timestamp, defaults to the current time
+        item_padding: Extra bytes per item to mimic the size of real NFT payloads
+
+    Returns:
+        Listings in marketActivity item format, newest first
+    """
+    rng = np.random.default_rng(zlib.crc32(gift_name.lower().encode()))
+    count = max(int(history_hours * listings_per_hour), 1)
+    end = time.time() if now is None else now
+    timestamps = end - np.linspace(0, history_hours * 3600, count)
+    base_price = rng.uniform(*BASE_PRICE_RANGE)
+    prices = base_price * np.exp(np.cumsum(rng.normal(0, PRICE_VOLATILITY, count)))
+
+    padding = "x" * item_padding
+    return [
+        {
+            "type": "listing",
+            "price": f"{price:.2f}",
+            "listed_at": datetime.fromtimestamp(ts, timezone.utc).strftime(LISTED_AT_FORMAT),
+            "nft": {"name": portalsapi.cap(gift_name), "padding": padding},
+        }
+        for ts, price in zip(timestamps.tolist(), prices.tolist())
+    ]
+
+class FakePortalsServer:
+    """
+    Local stand-in for the Portals market API.
+
+    Serves market/actions and collections/floors from one of three sources: synthetic listings,
+    responses replayed from a capture directory, or the real API, in which case
+    each response is also recorded into the capture directory for later replay.
+    Point the bot or bin/test.py at it with PORTALS_API_URL.
+    """
+
+    def __init__(
+        self,
+        mode: str = "synthetic",
+        capture_dir: Optional[str] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        history_hours: float = HISTORY_HOURS,
+        listings_per_hour: float = LISTINGS_PER_HOUR,
+        item_padding: int = 0,
+        upstream_url: str = UPSTREAM_API_URL,
+        gift_names: Optional[List[str]] = None,
+    ):
+        if mode not in ("synthetic", "replay", "capture"):
+            raise ValueError(f"Unknown mode: {mode}")
+        if mode != "synthetic" and not capture_dir:
+            raise ValueError(f"{mode} mode needs a capture directory")
+        self.mode = mode
+        self.capture_dir = capture_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.history_hours = history_hours
+        self.listings_per_hour = listings_per_hour
+        self.item_padding = item_padding
+        self.upstream_url = upstream_url
+        self.gift_names = gift_names or []
+        self.requests_served = 0
+        self._listings: Dict[str, List[Dict[str, Any]]] = {}
+        self._session: Optional[AsyncSession] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def api_url(self) -> str:
+        """Base URL to use as PORTALS_API_URL once the server is started"""
+        if self._runner is None or not self._runner.addresses:
+            raise RuntimeError("Fake Portals server is not running")
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def make_app(self) -> web.Application:
+        """Build the aiohttp application"""
+        app = web.Application()
+        app.router.add_get(API_PREFIX + "{tail:.*}", self._handle)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> str:
+        """Start serving in the running event loop and return the API base URL"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return self.api_url
+
+    async def stop(self) -> None:
+        """Stop serving"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _on_cleanup(self, app: web.Application) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests_served += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        if self.error_rate and random.random() < self.error_rate:
+            return web.json_response({"error": "injected failure"}, status=503)
+        if not request.headers.get("Authorization"):
+            return web.json_response({"error": "missing auth"}, status=401)
+
+        path = request.match_info["tail"]
+        query = dict(request.query)
+        if self.mode == "capture":
+            return await self._capture(request, path, query)
+        if self.mode == "replay":
+            return self._replay(path, query)
+        if path.rstrip("/") == "market/actions":
+            return web.json_response({"actions": self._market_actions(query)})
+        if path.rstrip("/") == "collections/floors":
+            return web.json_response({"floorPrices": self._floor_prices()})
+        return web.json_response({"error": f"not faked: {path}"}, status=404)
+
+    def _market_actions(self, query: Dict[str, str]) -> List[Dict[str, Any]]:
+        action_types = query.get("action_types", "")
+        if action_types and "listing" not in action_types.split(","):
+            return []
+
+        collections = query.get("filter_by_collections", "")
+        items: List[Dict[str, Any]] = []
+        for gift_name in filter(None, (name.strip() for name in collections.split(","))):
+            items.extend(self._gift_listings(gift_name))
+
+        field, descending = SORT_FIELDS.get(query.get("sort_by", ""), SORT_FIELDS["listed_at desc"])
+        if field == "price":
+            items = sorted(items, key=lambda item: float(item["price"]), reverse=descending)
+        else:
+            items = sorted(items, key=lambda item: item["listed_at"], reverse=descending)
+
+        offset = int(query.get("offset", 0))
+        limit = min(int(query.get("limit", 20)), MAX_PAGE_SIZE)
+        return items[offset:offset + limit]
+
+    def _floor_prices(self) -> Dict[str, str]:
+        # Floors of the configured gifts plus any gift already requested,
+        # keyed by short name like the real endpoint
+        names = {name.lower(): name for name in self.gift_names}
+        names.update({key: key for key in self._listings if key not in names})
+        floors: Dict[str, str] = {}
+        for gift_name in names.values():
+            newest = self._gift_listings(gift_name)[:FLOOR_LISTINGS]
+            floors[portalsapi.toShortName(gift_name)] = min(newest, key=lambda item: float(item["price"]))["price"]
+        return floors
+
+    def _gift_listings(self, gift_name: str) -> List[Dict[str, Any]]:
+        # Generated once per gift so paging sees a consistent history
+        key = gift_name.lower()
+        if key not in self._listings:
+            self._listings[key] = synthetic_listings(
+                gift_name, self.history_hours, self.listings_per_hour, item_padding=self.item_padding
+            )
+        return self._listings[key]
+
+    def _capture_path(self, path: str, query: Dict[str, str]) -> str:
+        return os.path.join(self.capture_dir or "", capture_key(path, query) + ".json")
+
+    def _replay(self, path: str, query: Dict[str, str]) -> web.Response:
+        capture_path = self._capture_path(path, query)
+        if not os.path.exists(capture_path):
+            return web.json_response({"error": f"no capture for {path}"}, status=404)
+        with open(capture_path, "r", encoding="utf-8") as f:
+            capture = json.load(f)
+        return web.json_response(capture["body"], status=capture["status"])
+
+    async def _capture(self, request: web.Request, path: str, query: Dict[str, str]) -> web.Response:
+        if self._session is None:
+            self._session = AsyncSession(impersonate="chrome110")
+        headers = dict(portalsapi.HEADERS)
+        headers["Authorization"] = request.headers["Authorization"]
+        response = await self._session.get(self.upstream_url + path + "?" + request.query_string, headers=headers)
+        try:
+            body = response.json()
+        except ValueError:
+            return web.Response(text=response.text, status=response.status_code)
+
+        if response.status_code == 200:
+            os.makedirs(self.capture_dir or ".", exist_ok=True)
+            with open(self._capture_path(path, query), "w", encoding="utf-8") as f:
+                json.dump({"path": path, "query": query, "status": response.status_code, "body": body}, f)
+        return web.json_response(body, status=response.status_code)
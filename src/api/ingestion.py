@@ -0,0 +1,382 @@
+import asyncio
+import time
+import numpy as np
+import portalsmp.portalsapi as portalsapi
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Dict, Iterable, List, Optional, Tuple, cast
+
+from src.api.api_client import (
+    HOURS_TO_FETCH,
+    DEFAULT_TIME_RANGE,
+    TIME_RANGES,
+    range_hours,
+    NUMBER_OF_POINTS,
+    DOWNSAMPLING_METHOD,
+    AuthData,
+    PortalsClient,
+    PriceHistory,
+    ChartData,
+    get_client,
+    get_current_price_async,
+    stream_listings,
+    STREAM_PAGE_SIZE,
+    STREAM_FIRST_PAGE_SIZE,
+    result_cache,
+    HISTORY_CACHE_TTL,
+    CURRENT_PRICE_CACHE_TTL,
+)
+from src.database.database import (
+    Listing,
+    get_watermark,
+    get_coverage,
+    clear_listings,
+    store_listings,
+    get_listings,
+    get_rollups,
+    prune_listings,
+    prune_rollups,
+    store_current_price,
+    store_current_prices,
+    get_current_prices,
+    get_stored_current_price,
+    get_past_floors,
+    prune_floor_history,
+)
+from src.api.resilience import CircuitOpenError, UpstreamUnavailableError
+from src.utils.downsampling import downsample
+from src.utils.price_series import PriceSeries, empty_series, series_to_history
+from src.utils.singleflight import SingleFlight
+
+# ----- Constants -----
+RETENTION_HOURS = HOURS_TO_FETCH
+FRESH_DATA_SECONDS = 60
+
+# Rollup resolutions in seconds and how long their buckets are kept
+MINUTE_ROLLUP = 60
+HOUR_ROLLUP = 60 * 60
+ROLLUP_RETENTION_HOURS: Dict[int, float] = {
+    MINUTE_ROLLUP: TIME_RANGES["24h"],
+    HOUR_ROLLUP: TIME_RANGES["30d"],
+}
+
+# Rollup resolution each chart range is read from; None reads raw listings
+RANGE_RESOLUTIONS: Dict[str, Optional[int]] = {
+    "1h": None,
+    "12h": None,
+    "24h": MINUTE_ROLLUP,
+    "7d": HOUR_ROLLUP,
+    "30d": HOUR_ROLLUP,
+}
+
+# Gifts ingested at the same time during a market sweep
+SWEEP_CONCURRENCY = 4
+OVERVIEW_CHANGE_HOURS = 24
+# Floor history is kept past the change window so a floor from its start is known
+FLOOR_HISTORY_HOURS = OVERVIEW_CHANGE_HOURS * 2
+
+# Floor price, and change in percent over OVERVIEW_CHANGE_HOURS if known
+MarketOverview = List[Tuple[str, float, Optional[float]]]
+
+# Monotonic time of the last successful ingestion per gift
+_last_ingested: Dict[str, float] = {}
+
+# Concurrent refreshes of the same gift share one upstream fetch and parse
+_inflight = SingleFlight()
+
+def is_fresh(gift_name: str, max_age: float = FRESH_DATA_SECONDS) -> bool:
+    """Check whether a gift was ingested within the last max_age seconds"""
+    last = _last_ingested.get(gift_name)
+    return last is not None and time.monotonic() - last < max_age
+
+def _window_start_ms(hours: float) -> int:
+    """Epoch ms timestamp of the start of a window ending now"""
+    return int((datetime.now(timezone.utc) - timedelta(hours=hours)).timestamp() * 1000)
+
+def is_covered(gift_name: str, hours: float) -> bool:
+    """Check whether every listing of a gift from the last given number of hours has been ingested"""
+    covered_since = get_coverage(gift_name)
+    return covered_since is not None and covered_since <= _window_start_ms(hours)
+
+async def ingest_listings(
+    gift_name: str,
+    auth_data: Optional[AuthData],
+    client: Optional[PortalsClient] = None,
+    hours: float = TIME_RANGES[DEFAULT_TIME_RANGE]
+) -> int:
+    """
+    Fetch listings newer than the gift's watermark and store them locally.
+    
+    Listings are requested newest first, page by page, and paging stops at the
+    first listing older than the watermark, so a warm gift only costs one
+    small page per refresh. A gift is only backfilled as far as the last
+    `hours` hours; asking for more hours later extends the backfill from
+    where it stopped. New listings are folded into the minute and hour
+    rollups as they are stored.
+    
+    Args:
+        gift_name: Name of the gift to ingest
+        auth_data: Portals auth data, or an AuthManager to refresh it on demand
+        client: Async client to use, defaults to the shared client
+        hours: How far back the gift's listings have to be stored
+        
+    Returns:
+        Number of listings fetched
+    """
+    if auth_data is None:
+        print("Error: auth_data is None")
+        return 0
+
+    key = ("ingest", gift_name)
+
+    def ingest() -> Awaitable[int]:
+        return _ingest_listings(gift_name, auth_data, client or get_client(), hours)
+
+    fetched = await _inflight.do(key, ingest)
+    if not await asyncio.to_thread(is_covered, gift_name, hours):
+        # Joined an ingestion of a shorter range, so backfill this one as well
+        fetched += await _inflight.do(key, ingest)
+    return fetched
+
+async def _ingest_listings(gift_name: str, auth_data: AuthData, client: PortalsClient, hours: float) -> int:
+    watermark = await asyncio.to_thread(get_watermark, gift_name)
+    covered_since = await asyncio.to_thread(get_coverage, gift_name)
+    window_start = _window_start_ms(hours)
+    retained_since = _window_start_ms(max(ROLLUP_RETENTION_HOURS.values()))
+    if watermark is None or covered_since is None or watermark < retained_since:
+        # Without a coverage start it is unknown which listings are already in
+        # the rollups, so the gift starts over from a cold backfill
+        if watermark is not None:
+            await asyncio.to_thread(clear_listings, gift_name)
+        watermark = covered_since = None
+    backfill = covered_since is None or covered_since > window_start
+    stop_at = window_start if backfill or watermark is None else watermark
+    resolutions = list(ROLLUP_RETENTION_HOURS)
+
+    # Pages are stored as they arrive. Listings between the coverage start and
+    # the watermark are stored already and skipped, so a backfill never counts
+    # a listing twice in a rollup. Equal timestamps at the watermark are
+    # re-read and deduplicated by the store.
+    fetched = 0
+    newest = watermark
+    # A backfill is known to span many pages, so it starts with full ones
+    first_page_size = STREAM_PAGE_SIZE if backfill else STREAM_FIRST_PAGE_SIZE
+    async for timestamps, prices in stream_listings(
+        gift_name, auth_data, stop_at, client, first_page_size=first_page_size
+    ):
+        if watermark is not None and covered_since is not None:
+            keep = (timestamps >= watermark) | (timestamps < covered_since)
+            timestamps, prices = timestamps[keep], prices[keep]
+            if len(timestamps) == 0:
+                continue
+        page: List[Listing] = list(zip(timestamps.tolist(), prices.tolist()))
+        fetched += len(page)
+        newest = max(newest or 0, int(timestamps.max()))
+        oldest = int(timestamps.min())
+        if watermark is None or oldest < watermark:
+            # Everything newer than this page is stored with it, so the
+            # watermark and coverage advance with the page and an interrupted
+            # backfill resumes from it
+            covered_since = oldest if covered_since is None else min(covered_since, oldest)
+            await asyncio.to_thread(store_listings, gift_name, page, newest, resolutions, covered_since)
+        else:
+            await asyncio.to_thread(store_listings, gift_name, page, None, resolutions)
+
+    await asyncio.to_thread(
+        store_listings, gift_name, [], newest, (), min(covered_since or window_start, window_start)
+    )
+    await asyncio.to_thread(prune_listings, _window_start_ms(RETENTION_HOURS))
+    for resolution, hours_kept in ROLLUP_RETENTION_HOURS.items():
+        await asyncio.to_thread(prune_rollups, resolution, _window_start_ms(hours_kept))
+    await asyncio.to_thread(prune_floor_history, time.time() - FLOOR_HISTORY_HOURS * 3600)
+    _last_ingested[gift_name] = time.monotonic()
+    if fetched:
+        for time_range in TIME_RANGES:
+            result_cache.pop(("stored_history", gift_name, time_range))
+    return fetched
+
+def _read_series(gift_name: str, time_range: str) -> PriceSeries:
+    """Read a range's series from raw listings or from its rollup"""
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    since_ms = _window_start_ms(range_hours(time_range))
+    resolution = RANGE_RESOLUTIONS.get(time_range)
+
+    if resolution is None:
+        rows = get_listings(gift_name, since_ms, now_ms)
+    else:
+        # Each bucket is charted at its start with its closing price
+        rows = [
+            (bucket_start, close_price)
+            for bucket_start, _, _, close_price, _ in get_rollups(gift_name, resolution, since_ms, now_ms)
+        ]
+    if not rows:
+        return empty_series()
+    columns = np.array(rows, dtype=np.float64).T
+    return columns[0].astype(np.int64), columns[1]
+
+def read_price_history(gift_name: str, time_range: str = DEFAULT_TIME_RANGE) -> PriceHistory:
+    """
+    Read a chart range for a gift from local storage.
+    
+    Ranges up to 12h are read from raw listings, 24h from up to 1440 minute
+    buckets and 7d/30d from up to 720 hourly buckets.
+    """
+    series = _read_series(gift_name, time_range)
+    if len(series[0]) == 0:
+        return []
+    return cast(PriceHistory, series_to_history(downsample(series, NUMBER_OF_POINTS, DOWNSAMPLING_METHOD)))
+
+async def get_floor_price(
+    gift_name: str,
+    auth_data: Optional[AuthData],
+    client: Optional[PortalsClient] = None
+) -> Optional[float]:
+    """
+    Get a gift's floor: the cheapest live listing as reported by Portals.
+    
+    This is the one floor the bot shows. Market sweeps cache and store the
+    same value from collections/floors, so a floor is only fetched (and
+    stored for the /market overview) when no sweep or request cached one.
+    When Portals does not answer, the last stored floor is served instead.
+    """
+    cached = result_cache.get(("current_price", gift_name))
+    if cached is not None:
+        return cached
+    floor_price = await get_current_price_async(gift_name, auth_data, client)
+    if floor_price is not None:
+        await asyncio.to_thread(store_current_price, gift_name, floor_price)
+        return floor_price
+    stored = await asyncio.to_thread(get_stored_current_price, gift_name)
+    return stored[0] if stored else None
+
+async def get_stored_chart_data(
+    gift_name: str,
+    auth_data: Optional[AuthData],
+    client: Optional[PortalsClient] = None,
+    max_age: float = FRESH_DATA_SECONDS,
+    time_range: str = DEFAULT_TIME_RANGE
+) -> ChartData:
+    """
+    Return a chart range and the current floor for a gift.
+    
+    New listings are ingested first unless the store is fresh, and the floor
+    comes from get_floor_price. When Portals is unavailable the stored
+    (possibly stale) range is served; UpstreamUnavailableError is only raised
+    if nothing is stored yet.
+    """
+    key = ("stored_history", gift_name, time_range)
+    hours = range_hours(time_range)
+
+    async def load() -> PriceHistory:
+        upstream_error: Optional[UpstreamUnavailableError] = None
+        if not is_fresh(gift_name, max_age) or not await asyncio.to_thread(is_covered, gift_name, hours):
+            try:
+                await ingest_listings(gift_name, auth_data, client, hours)
+            except UpstreamUnavailableError as e:
+                print(f"Error ingesting price history: {e}")
+                upstream_error = e
+            except Exception as e:
+                print(f"Error ingesting price history: {e}")
+        history = await asyncio.to_thread(read_price_history, gift_name, time_range)
+        if not history and upstream_error is not None:
+            raise upstream_error
+        if history:
+            result_cache.set(key, history, ttl=HISTORY_CACHE_TTL)
+        return history
+
+    cached = result_cache.get(key)
+    if cached is not None and is_fresh(gift_name, max_age):
+        history = cached
+    else:
+        history = await _inflight.do(key, load)
+    floor_price = await get_floor_price(gift_name, auth_data, client) if history else None
+    return list(history), floor_price
+
+async def refresh_gift(
+    gift_name: str,
+    auth_data: Optional[AuthData],
+    client: Optional[PortalsClient] = None
+) -> None:
+    """Ingest new listings for a gift and re-warm its cached chart data"""
+    await ingest_listings(gift_name, auth_data, client)
+    await get_stored_chart_data(gift_name, auth_data, client)
+
+async def sweep_market(
+    gift_names: Iterable[str],
+    auth_data: Optional[AuthData],
+    client: Optional[PortalsClient] = None,
+    concurrency: int = SWEEP_CONCURRENCY,
+    max_age: float = FRESH_DATA_SECONDS
+) -> Dict[str, float]:
+    """
+    Refresh the floor price and recent history of every gift in one pass.
+    
+    All floors come from a single collections/floors request and are stored
+    together. Listings are then ingested for up to `concurrency` gifts at a
+    time on top of the client's adaptive request limit; gifts ingested within
+    max_age are skipped, and the sweep stops early if the circuit opens.
+    
+    Args:
+        gift_names: Gifts to refresh, e.g. every collection in gifts.json
+        auth_data: Portals auth data, or an AuthManager to refresh it on demand
+        client: Async client to use, defaults to the shared client
+        concurrency: Maximum number of gifts ingested at once
+        max_age: Skip gifts ingested within this many seconds
+        
+    Returns:
+        Floor price per gift name for the gifts Portals reported a floor for
+    """
+    if auth_data is None:
+        print("Error: auth_data is None")
+        return {}
+    client = client or get_client()
+    gift_names = list(gift_names)
+
+    floors_by_short_name = await client.gifts_floors(auth_data)
+    floors: Dict[str, float] = {}
+    for gift_name in gift_names:
+        floor_price = floors_by_short_name.get(portalsapi.toShortName(gift_name))
+        if floor_price is not None:
+            floors[gift_name] = floor_price
+            result_cache.set(("current_price", gift_name), floor_price, ttl=CURRENT_PRICE_CACHE_TTL)
+    await asyncio.to_thread(store_current_prices, floors)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    circuit_open = asyncio.Event()
+
+    async def ingest(gift_name: str) -> None:
+        async with semaphore:
+            if circuit_open.is_set() or is_fresh(gift_name, max_age):
+                return
+            try:
+                await ingest_listings(gift_name, auth_data, client)
+            except CircuitOpenError:
+                circuit_open.set()
+            except Exception as e:
+                print(f"Error ingesting {gift_name} during market sweep: {e}")
+
+    await asyncio.gather(*(ingest(gift_name) for gift_name in gift_names))
+    if circuit_open.is_set():
+        print("Market sweep stopped early: Portals API circuit is open")
+    return floors
+
+def market_overview(gift_names: Iterable[str]) -> MarketOverview:
+    """
+    Read every gift's stored floor price and its change over the last
+    OVERVIEW_CHANGE_HOURS hours, most expensive first.
+    
+    The change compares against the floor stored OVERVIEW_CHANGE_HOURS ago,
+    the same floor the chart cards show, and is unknown until one is.
+    """
+    current_prices = get_current_prices()
+    past_floors = get_past_floors(time.time() - OVERVIEW_CHANGE_HOURS * 3600)
+
+    overview: MarketOverview = []
+    for gift_name in gift_names:
+        if gift_name not in current_prices:
+            continue
+        price = current_prices[gift_name][0]
+        past = past_floors.get(gift_name)
+        change = (price - past) / past * 100 if past else None
+        overview.append((gift_name, price, change))
+    overview.sort(key=lambda row: row[1], reverse=True)
+    return overview
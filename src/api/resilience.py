@@ -0,0 +1,191 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# ----- Constants -----
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 5.0
+
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+
+AIMD_INITIAL_LIMIT = 4
+AIMD_MIN_LIMIT = 1
+AIMD_MAX_LIMIT = 8
+AIMD_DECREASE_FACTOR = 0.5
+
+# ----- Exceptions -----
+class UpstreamUnavailableError(Exception):
+    """Raised when the upstream API is failing or calls are being shed"""
+
+class CircuitOpenError(UpstreamUnavailableError):
+    """Raised instead of calling upstream while the circuit breaker is open"""
+
+class RetryableError(UpstreamUnavailableError):
+    """A transient upstream failure (network error, timeout, 429 or 5xx) worth retrying"""
+
+class CircuitBreaker:
+    """
+    Fail fast while upstream is unhealthy.
+    
+    After failure_threshold consecutive failures the circuit opens and calls
+    are rejected for reset_timeout seconds. Then a single probe call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open"""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if a call is not allowed right now"""
+        state = self.state
+        if state == "open" or (state == "half_open" and self._probing):
+            raise CircuitOpenError("Portals API circuit is open, failing fast")
+        if state == "half_open":
+            self._probing = True
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call"""
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit at the threshold or after a failed probe"""
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def cancel_probe(self) -> None:
+        """Let another probe through after one ended without an upstream outcome"""
+        self._probing = False
+
+class AIMDLimiter:
+    """
+    Concurrency limit that adapts to upstream health.
+    
+    The limit grows additively (by about one per limit successful calls) and
+    is cut multiplicatively on each overload failure, like TCP congestion
+    control, so in-flight requests shrink quickly when upstream struggles.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = AIMD_INITIAL_LIMIT,
+        min_limit: float = AIMD_MIN_LIMIT,
+        max_limit: float = AIMD_MAX_LIMIT,
+        decrease_factor: float = AIMD_DECREASE_FACTOR,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """Wait for a free slot under the current limit"""
+        async with self._condition:
+            while self.in_flight >= int(self.limit):
+                await self._condition.wait()
+            self.in_flight += 1
+
+    async def release(self, success: Optional[bool]) -> None:
+        """Free a slot and adjust the limit from the call outcome; None leaves it unchanged"""
+        async with self._condition:
+            self.in_flight -= 1
+            if success:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            elif success is not None:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            self._condition.notify_all()
+
+def backoff_delay(attempt: int, base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY) -> float:
+    """Full-jitter exponential backoff delay for a zero-based retry attempt"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+class UpstreamGuard:
+    """
+    Resilience layer for upstream calls.
+    
+    Each call passes the circuit breaker, runs under the AIMD concurrency
+    limit and is retried with jittered exponential backoff on RetryableError.
+    Other exceptions (bad requests, auth failures) are raised immediately and
+    do not count against upstream health.
+    """
+
+    def __init__(
+        self,
+        breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[AIMDLimiter] = None,
+        attempts: int = RETRY_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+    ):
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter or AIMDLimiter()
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run an upstream call with circuit breaking, concurrency limiting and retries.
+        
+        Args:
+            fn: Zero-argument coroutine function performing one attempt
+            
+        Returns:
+            Result of the first successful attempt
+            
+        Raises:
+            CircuitOpenError: If the circuit is open
+            RetryableError: If every attempt failed with a transient error
+        """
+        for attempt in range(self.attempts):
+            # The breaker is checked once a slot is held, so a caller cancelled
+            # while waiting for the limiter never holds the half-open probe
+            await self.limiter.acquire()
+            try:
+                self.breaker.before_call()
+            except BaseException:
+                await self.limiter.release(None)
+                raise
+            success: Optional[bool] = None
+            try:
+                result = await fn()
+            except RetryableError:
+                success = False
+                self.breaker.record_failure()
+                if attempt == self.attempts - 1:
+                    raise
+            except BaseException:
+                # Not an upstream health signal (e.g. cancellation)
+                self.breaker.cancel_probe()
+                raise
+            else:
+                success = True
+                self.breaker.record_success()
+                return result
+            finally:
+                await self.limiter.release(success)
+            await asyncio.sleep(backoff_delay(attempt, self.base_delay, self.max_delay))
+        raise RetryableError("Portals API call failed")
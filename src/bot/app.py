@@ -0,0 +1,598 @@
+import asyncio
+import os
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Tuple, cast, Optional, Any
+
+from aiogram import Bot, Dispatcher, F, types
+from aiogram.filters import Command, CommandStart
+from aiogram.types import BufferedInputFile, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, Message
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from dotenv import load_dotenv
+from PIL import Image
+from io import BytesIO
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from src.generators.card_inputs import card_inputs, range_time_label_format
+from src.generators.chart_generator import PriceData as ChartPriceData
+from src.generators.fonts import font_report
+from src.generators.encoding import DEFAULT_IMAGE_FORMAT, DEFAULT_PNG_COMPRESS_LEVEL, DEFAULT_QUALITY, IMAGE_FORMATS, image_filename
+from src.generators.renderer import CardRenderer, RENDER_WORKERS
+from src.utils.gift_catalog import get_catalog
+from src.utils.gift_image_utils import prefetch_gift_images
+from src.api.api_client import close_client, configure_api_url, TIME_RANGES, DEFAULT_TIME_RANGE
+from src.api.auth_manager import AuthManager
+from src.api.fake_auth import fake_auth_enabled, fake_update_auth
+from src.api.ingestion import get_stored_chart_data, market_overview
+from src.api.resilience import UpstreamUnavailableError
+from src.bot.card_cache import CardCache
+from src.bot.poller import MarketPoller
+from src.bot.sweeper import MarketSweeper
+from src.database.database import init_db, update_last_success, get_last_success_time, record_gift_request
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+# Initialize bot and dispatcher
+token = os.getenv("TELEGRAM_BOT_TOKEN")
+if not token:
+    raise ValueError("TELEGRAM_BOT_TOKEN not found in environment variables ❌")
+    
+bot = Bot(token=token)
+dp = Dispatcher()
+
+# Gift name mappings for better user experience
+GIFT_NAME_MAP: Dict[str, str] = {
+    # Jack in the Box variations
+    "jack in the box": "Jack-in-the-Box",
+    "jack-in the box": "Jack-in-the-Box",
+    "jack-in-the box": "Jack-in-the-Box",
+    "jack": "Jack-in-the-Box",
+    "jack box": "Jack-in-the-Box",
+    "jitb": "Jack-in-the-Box",
+    
+    # B-Day Candle variations
+    "b day candle": "B-Day Candle",
+    "b day-candle": "B-Day Candle",
+    "bday candle": "B-Day Candle",
+    "birthday candle": "B-Day Candle",
+    "candle": "B-Day Candle",
+    
+    # Plush Pepe variations
+    "plush": "Plush Pepe",
+    "pepe": "Plush Pepe",
+    "pepe plush": "Plush Pepe",
+    "plush pepe": "Plush Pepe",
+    "frog plush": "Plush Pepe",
+    "frog": "Plush Pepe",
+
+    # Crystal Ball variations
+    "crystal": "Crystal Ball",
+    "crystal ball": "Crystal Ball",
+    "ball": "Crystal Ball",
+    "magic ball": "Crystal Ball",
+    "fortune ball": "Crystal Ball",
+
+    # Heart Locket variations
+    "heart": "Heart Locket",
+    "locket": "Heart Locket",
+    "heart locket": "Heart Locket",
+    "heart-locket": "Heart Locket",
+    
+    # Toy Bear variations
+    "teddy": "Toy Bear",
+    "bear": "Toy Bear",
+    "teddy bear": "Toy Bear",
+    "toy bear": "Toy Bear",
+    
+    # Lush Bouquet variations
+    "bouquet": "Lush Bouquet",
+    "flowers": "Lush Bouquet",
+    "flower": "Lush Bouquet",
+    "flower bouquet": "Lush Bouquet",
+    "lush bouquet": "Lush Bouquet",
+    
+    # Perfume Bottle variations
+    "perfume": "Perfume Bottle",
+    "fragrance": "Perfume Bottle",
+    "scent": "Perfume Bottle",
+    "perfume bottle": "Perfume Bottle",
+    
+    # Diamond Ring variations
+    "diamond": "Diamond Ring",
+    "ring": "Diamond Ring",
+    "diamond ring": "Diamond Ring",
+    
+    # Santa Hat variations
+    "santa": "Santa Hat",
+    "santa hat": "Santa Hat",
+    "christmas hat": "Santa Hat",
+    
+    # Signet Ring variations
+    "signet": "Signet Ring",
+    "signet ring": "Signet Ring",
+    
+    # Precious Peach variations
+    "peach": "Precious Peach",
+    "precious peach": "Precious Peach",
+    
+    # Spiced Wine variations
+    "wine": "Spiced Wine",
+    "spiced wine": "Spiced Wine",
+    "mulled wine": "Spiced Wine",
+    
+    # Jelly Bunny variations
+    "bunny": "Jelly Bunny",
+    "jelly": "Jelly Bunny",
+    "jelly bunny": "Jelly Bunny",
+    
+    # Durov's Cap variations
+    "cap": "Durov's Cap",
+    "durov": "Durov's Cap",
+    "durovs cap": "Durov's Cap",
+    "durov cap": "Durov's Cap",
+    
+    # Eternal Rose variations
+    "rose": "Eternal Rose",
+    "eternal rose": "Eternal Rose",
+    "forever rose": "Eternal Rose",
+    
+    # Berry Box variations
+    "berry": "Berry Box",
+    "berries": "Berry Box",
+    "berry box": "Berry Box",
+    
+    # Vintage Cigar variations
+    "cigar": "Vintage Cigar",
+    "vintage cigar": "Vintage Cigar",
+    
+    # Magic Potion variations
+    "potion": "Magic Potion",
+    "magic potion": "Magic Potion",
+    
+    # Kissed Frog variations
+    "kissed": "Kissed Frog",
+    "kissed frog": "Kissed Frog",
+    
+    # Hex Pot variations
+    "hex": "Hex Pot",
+    "hex pot": "Hex Pot",
+    "pot": "Hex Pot",
+    
+    # Evil Eye variations
+    "evil": "Evil Eye",
+    "eye": "Evil Eye",
+    "evil eye": "Evil Eye",
+    
+    # Sharp Tongue variations
+    "tongue": "Sharp Tongue",
+    "sharp tongue": "Sharp Tongue",
+    
+    # Trapped Heart variations
+    "trapped": "Trapped Heart",
+    "trapped heart": "Trapped Heart",
+    
+    # Skull Flower variations
+    "skull": "Skull Flower",
+    "skull flower": "Skull Flower",
+    
+    # Scared Cat variations
+    "cat": "Scared Cat",
+    "scared cat": "Scared Cat",
+    "scaredy cat": "Scared Cat",
+    
+    # Spy Agaric variations
+    "agaric": "Spy Agaric",
+    "spy": "Spy Agaric",
+    "spy agaric": "Spy Agaric",
+    "mushroom": "Spy Agaric",
+    
+    # Homemade Cake variations
+    "cake": "Homemade Cake",
+    "homemade": "Homemade Cake",
+    "homemade cake": "Homemade Cake",
+    
+    # Genie Lamp variations
+    "genie": "Genie Lamp",
+    "lamp": "Genie Lamp",
+    "genie lamp": "Genie Lamp",
+    "magic lamp": "Genie Lamp",
+    
+    # Lunar Snake variations
+    "lunar": "Lunar Snake",
+    "lunar snake": "Lunar Snake",
+    
+    # Party Sparkler variations
+    "sparkler": "Party Sparkler",
+    "party sparkler": "Party Sparkler",
+    "sparkle": "Party Sparkler",
+    
+    # Jester Hat variations
+    "jester": "Jester Hat",
+    "jester hat": "Jester Hat",
+    
+    # Witch Hat variations
+    "witch": "Witch Hat",
+    "witch hat": "Witch Hat",
+    
+    # Hanging Star variations
+    "star": "Hanging Star",
+    "hanging star": "Hanging Star",
+    
+    # Love Candle variations
+    "love candle": "Love Candle",
+    
+    # Cookie Heart variations
+    "cookie": "Cookie Heart",
+    "cookie heart": "Cookie Heart",
+    "heart cookie": "Cookie Heart",
+    
+    # Snow Globe variations
+    "snow": "Snow Globe",
+    "globe": "Snow Globe",
+    "snow globe": "Snow Globe",
+    
+    # Holiday Drink variations
+    "drink": "Holiday Drink",
+    "holiday": "Holiday Drink",
+    "holiday drink": "Holiday Drink",
+    
+    # Light Sword variations
+    "sword": "Light Sword",
+    "light": "Light Sword",
+    "light sword": "Light Sword",
+    "lightsaber": "Light Sword",
+    
+    # Bow Tie variations
+    "bow": "Bow Tie",
+    "tie": "Bow Tie",
+    "bow tie": "Bow Tie",
+    
+    # Nail Bracelet variations
+    "bracelet": "Nail Bracelet",
+    "nail": "Nail Bracelet",
+    "nail bracelet": "Nail Bracelet"
+}
+
+# Get API credentials
+api_id = int(os.getenv("API_ID", "0"))
+api_hash = os.getenv("API_HASH", "")
+
+# PORTALS_API_URL may point at a local fake server (bin/fake_portals.py);
+# PORTALS_FAKE_AUTH skips Telegram and uses offline auth data for it
+configure_api_url()
+
+# Auth data is fetched on startup and refreshed in the background before it expires
+auth_manager = AuthManager(api_id, api_hash, update_auth=fake_update_auth if fake_auth_enabled() else None)
+
+# Rate limiting
+RATE_LIMIT_SECONDS = 10
+
+# Chart ranges
+RANGE_DESCRIPTIONS: Dict[str, str] = {
+    "1h": "last hour",
+    "12h": "last 12 hours",
+    "24h": "last 24 hours",
+    "7d": "last 7 days",
+    "30d": "last 30 days",
+}
+RANGE_CALLBACK_PREFIX = "range:"
+
+# Background polling of the most requested gifts
+POLL_INTERVAL_SECONDS = float(os.getenv("POLL_INTERVAL_SECONDS", "30"))
+POLL_TOP_GIFTS = int(os.getenv("POLL_TOP_GIFTS", "10"))
+
+poller = MarketPoller(auth_manager, interval=POLL_INTERVAL_SECONDS, top_gifts=POLL_TOP_GIFTS)
+
+# Cards are rendered in a warm process pool; 0 renders in a thread instead
+CARD_FORMAT = os.getenv("CARD_FORMAT", DEFAULT_IMAGE_FORMAT).lower()
+if CARD_FORMAT not in IMAGE_FORMATS:
+    raise ValueError(f"CARD_FORMAT must be one of {', '.join(IMAGE_FORMATS)} ❌")
+
+renderer = CardRenderer(
+    workers=int(os.getenv("RENDER_WORKERS", str(RENDER_WORKERS))),
+    image_format=CARD_FORMAT,
+    quality=int(os.getenv("CARD_QUALITY", str(DEFAULT_QUALITY))),
+    compress_level=int(os.getenv("CARD_PNG_COMPRESS_LEVEL", str(DEFAULT_PNG_COMPRESS_LEVEL))),
+)
+
+# Telegram file_ids of cards sent within the last minute
+card_cache = CardCache()
+
+# Market-wide sweep of every gift in gifts.json; 0 disables it
+SWEEP_INTERVAL_SECONDS = float(os.getenv("SWEEP_INTERVAL_SECONDS", "900"))
+OVERVIEW_TOP_GIFTS = 20
+
+sweeper = MarketSweeper(auth_manager, interval=SWEEP_INTERVAL_SECONDS)
+
+# Initialize database
+init_db()
+
+@dp.message(CommandStart())
+async def start_command(message: types.Message):
+    """Handle the /start command"""
+    try:
+        user_name = message.from_user.first_name if message.from_user else "there"
+        await message.answer(
+            f"Hi {user_name}! I'm the Telegram Gift Price Bot 🎁\n\n"
+            "I can show you price cards for Telegram gifts with modern cool chart photos 📊\n\n"
+            "Just send me the name of any Telegram gift to see its price chart! ✨\n\n"
+            "For example, try: 'Plush Pepe 🐸', 'Crystal Ball 🔮', 'Heart Locket 💝', etc."
+        )
+    except TelegramForbiddenError:
+        logging.info(f"User {message.from_user.id if message.from_user else 'Unknown'} has blocked the bot")
+    except Exception as e:
+        logging.error(f"Error in start_command: {e}")
+
+@dp.message(Command("market"))
+async def market_command(message: types.Message):
+    """Handle the /market command with an overview of floor prices from the local store"""
+    try:
+        overview = await asyncio.to_thread(market_overview, get_catalog().names)
+        if not overview:
+            await message.answer("Market data is still being collected. Please try again in a few minutes! ⏳")
+            return
+
+        lines = [f"📊 Market overview (top {min(len(overview), OVERVIEW_TOP_GIFTS)} by floor price)\n"]
+        for gift_name, price, change in overview[:OVERVIEW_TOP_GIFTS]:
+            change_text = f"{change:+.1f}%" if change is not None else "n/a"
+            lines.append(f"🎁 {gift_name}: {price:,.2f} TON ({change_text} 24h)")
+        await message.answer("\n".join(lines))
+    except TelegramForbiddenError:
+        logging.info(f"User {message.from_user.id if message.from_user else 'Unknown'} has blocked the bot")
+    except Exception as e:
+        logging.error(f"Error in market_command: {e}")
+
+def get_wait_seconds(user_id: int) -> int:
+    """Get how many seconds a user has to wait before the next request (0 if none)"""
+    # Check rate limit only if there was a successful request
+    last_success = get_last_success_time(user_id)
+    if last_success is not None:
+        time_since_last = datetime.now().timestamp() - last_success
+        if time_since_last < RATE_LIMIT_SECONDS:
+            return RATE_LIMIT_SECONDS - int(time_since_last)
+    return 0
+
+def build_range_keyboard(gift_name: str, current_range: str) -> InlineKeyboardMarkup:
+    """Build inline buttons for switching a gift chart to another range"""
+    builder = InlineKeyboardBuilder()
+    for time_range in TIME_RANGES:
+        text = f"• {time_range} •" if time_range == current_range else time_range
+        builder.button(text=text, callback_data=f"{RANGE_CALLBACK_PREFIX}{gift_name}:{time_range}")
+    builder.adjust(len(TIME_RANGES))
+    return builder.as_markup()
+
+def split_time_range(text: str) -> Tuple[str, str]:
+    """Split an optional trailing range suffix (e.g. 'Plush Pepe 7d') off a request"""
+    parts = text.strip().rsplit(maxsplit=1)
+    if len(parts) == 2 and parts[1].lower() in TIME_RANGES:
+        return parts[0].strip(), parts[1].lower()
+    return text.strip(), DEFAULT_TIME_RANGE
+
+async def generate_and_send_chart(
+    chat_id: int,
+    gift_name: str,
+    message_id: Optional[int] = None,
+    time_range: str = DEFAULT_TIME_RANGE
+) -> bool:
+    """Generate and send chart image"""
+    try:
+        # Get price history and current price from the local store, ingesting new listings first
+        api_price_data, current_price = await get_stored_chart_data(gift_name, auth_manager, time_range=time_range)
+        if not api_price_data:
+            await bot.send_message(chat_id, f"Sorry, I couldn't find any price history for '{gift_name}' in the {RANGE_DESCRIPTIONS[time_range]}. Please try again later! 📈")
+            if message_id is not None:
+                await bot.delete_message(chat_id, message_id)
+            return False
+
+        # Update data with current price if needed
+        if current_price is None:
+            await bot.send_message(chat_id, "Sorry, couldn't get current price. Please try again later! 📈")
+            if message_id is not None:
+                await bot.delete_message(chat_id, message_id)
+            return False
+
+        price_ton = float(current_price)
+
+        # Identical data within the same minute is served from the card cache;
+        # keyed before the current price point is stamped with the current time
+        card_key = card_cache.key(gift_name, time_range, cast(List[ChartPriceData], api_price_data), price_ton)
+
+        # Chart points ending with the current price, price in stars and change against the chart high
+        price_data, price_stars, percent_change = card_inputs(api_price_data, price_ton)
+
+        caption = f"Price chart for 🎁 {gift_name} ({time_range}) ✨"
+        reply_markup = build_range_keyboard(gift_name, time_range)
+        uploaded = False
+
+        async def render_and_upload() -> Optional[str]:
+            nonlocal uploaded
+            # Render the chart and card in the render pool
+            card_image = await renderer.render_card(
+                gift_name,
+                price_data,
+                price_stars,
+                percent_change,
+                datetime.now(timezone.utc),
+                time_label_format=range_time_label_format(time_range)
+            )
+            if not card_image:
+                return None
+
+            # Upload straight from memory
+            sent = await bot.send_photo(
+                chat_id,
+                BufferedInputFile(card_image, filename=image_filename(f"{gift_name} {time_range}", CARD_FORMAT)),
+                caption=caption,
+                reply_markup=reply_markup
+            )
+            uploaded = True
+            return sent.photo[-1].file_id if sent.photo else None
+
+        file_id = await card_cache.get_or_upload(card_key, render_and_upload)
+        if not uploaded and file_id is not None:
+            # Same card already uploaded: resend it by file_id
+            try:
+                await bot.send_photo(chat_id, file_id, caption=caption, reply_markup=reply_markup)
+            except TelegramBadRequest as e:
+                # Telegram no longer accepts the file_id: forget it and upload the card again
+                logging.warning(f"Cached card for {gift_name} was rejected, uploading it again: {e}")
+                card_cache.pop(card_key)
+                file_id = await card_cache.get_or_upload(card_key, render_and_upload)
+                if not uploaded and file_id is not None:
+                    await bot.send_photo(chat_id, file_id, caption=caption, reply_markup=reply_markup)
+        if not uploaded and file_id is None:
+            await bot.send_message(chat_id, "Sorry, I couldn't generate the chart. Please try again later! 😔")
+            if message_id is not None:
+                await bot.delete_message(chat_id, message_id)
+            return False
+
+        # Delete processing message if exists
+        if message_id is not None:
+            await bot.delete_message(chat_id, message_id)
+        return True
+    except UpstreamUnavailableError as e:
+        logging.warning(f"Portals unavailable for {gift_name}: {e}")
+        await bot.send_message(chat_id, "Sorry, the Portals market is not responding right now. Please try again in a minute! ⏳")
+        if message_id is not None:
+            await bot.delete_message(chat_id, message_id)
+        return False
+    except Exception as e:
+        logging.error(f"Error processing gift request: {e}")
+        await bot.send_message(chat_id, "Sorry, something went wrong while processing your request. Please try again later! 😔")
+        if message_id is not None:
+            await bot.delete_message(chat_id, message_id)
+        return False
+
+@dp.message()
+async def handle_gift_request(message: types.Message):
+    """Handle gift name messages"""
+    try:
+        if not message.text:
+            await message.answer("Please send me a text message with the gift name! 🎁")
+            return
+        
+        if not message.from_user:
+            await message.answer("Error identifying user ❌")
+            return
+        
+        user_id = message.from_user.id
+        
+        wait_seconds = get_wait_seconds(user_id)
+        if wait_seconds:
+            await message.answer(f"Please wait {wait_seconds} seconds before making another request ⏳")
+            return
+            
+        # Clean up the gift name and pick the chart range
+        gift_name, time_range = split_time_range(message.text)
+        gift_name_lower = gift_name.lower()
+        
+        # Try to find the gift in our mapping first
+        mapped_name = GIFT_NAME_MAP.get(gift_name_lower)
+        if mapped_name:
+            gift_name = mapped_name
+            gift_name_lower = mapped_name.lower()
+        
+        # Check if the gift exists
+        catalog = get_catalog()
+        canonical_name = catalog.canonical_name(gift_name)
+        if canonical_name is None:
+            # Get list of similar gifts for suggestion
+            similar_gifts = []
+            # First check GIFT_NAME_MAP for similar names
+            for key, value in GIFT_NAME_MAP.items():
+                if any(word in key for word in gift_name_lower.split()):
+                    if value not in similar_gifts:
+                        similar_gifts.append(value)
+            # Then check original names if we don't have enough suggestions
+            if len(similar_gifts) < 5:
+                for name in catalog.names:
+                    if name not in similar_gifts and any(word in name.lower() for word in gift_name_lower.split()):
+                        similar_gifts.append(name)
+                    if len(similar_gifts) >= 5:
+                        break
+            
+            suggestion_text = "\n\nDid you mean one of these? 🤔\n" + "\n".join([f"• {name} ✨" for name in similar_gifts[:5]]) if similar_gifts else ""
+            
+            await message.answer(
+                f"Sorry, I couldn't find '{gift_name}'. Please check the gift name and try again! 🔍" + suggestion_text
+            )
+            return
+
+        gift_name = canonical_name
+        record_gift_request(gift_name)
+
+        # Send processing message
+        processing_msg = await message.answer(f"Generating price chart for {gift_name} 🎨...")
+        
+        # Generate and send chart
+        success = await generate_and_send_chart(message.chat.id, gift_name, processing_msg.message_id, time_range)
+        
+        # Update rate limit only on success
+        if success:
+            update_last_success(user_id)
+    except TelegramForbiddenError:
+        logging.info(f"User {message.from_user.id if message.from_user else 'Unknown'} has blocked the bot")
+    except Exception as e:
+        logging.error(f"Error in handle_gift_request: {e}")
+        try:
+            await message.answer("Sorry, something went wrong while processing your request. Please try again later! 😔")
+        except TelegramForbiddenError:
+            pass
+
+@dp.callback_query(F.data.startswith(RANGE_CALLBACK_PREFIX))
+async def handle_range_button(callback: CallbackQuery):
+    """Handle chart range buttons"""
+    try:
+        _, gift_name, time_range = (callback.data or "").rsplit(":", 2)
+        if gift_name not in get_catalog() or time_range not in TIME_RANGES or callback.message is None:
+            await callback.answer("This chart is no longer available ❌")
+            return
+
+        wait_seconds = get_wait_seconds(callback.from_user.id)
+        if wait_seconds:
+            await callback.answer(f"Please wait {wait_seconds} seconds before making another request ⏳")
+            return
+
+        await callback.answer(f"Generating {time_range} chart for {gift_name} 🎨...")
+        record_gift_request(gift_name)
+        success = await generate_and_send_chart(callback.message.chat.id, gift_name, None, time_range)
+        if success:
+            update_last_success(callback.from_user.id)
+    except TelegramForbiddenError:
+        logging.info(f"User {callback.from_user.id} has blocked the bot")
+    except Exception as e:
+        logging.error(f"Error in handle_range_button: {e}")
+
+async def on_startup():
+    """Fetch auth data, warm up the render pool and start background auth refresh, polling and market sweeps"""
+    try:
+        await auth_manager.get()
+    except Exception as e:
+        raise ValueError(f"Failed to get auth data. Check your API credentials ❌ ({e})")
+    logging.info(font_report())
+    # Gift art is cached on disk before the render workers load it into memory
+    downloaded = await prefetch_gift_images(get_catalog().ids)
+    logging.info(f"Prefetched {downloaded} gift images")
+    await renderer.start()
+    auth_manager.start()
+    poller.start()
+    if SWEEP_INTERVAL_SECONDS > 0:
+        sweeper.start()
+
+async def on_shutdown():
+    """Stop background tasks and release pooled upstream connections"""
+    await sweeper.stop()
+    await poller.stop()
+    await auth_manager.stop()
+    await close_client()
+    await renderer.stop()
+
+async def main():
+    """Main function to start the bot"""
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+    await dp.start_polling(bot)
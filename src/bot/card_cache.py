@@ -0,0 +1,105 @@
+import hashlib
+import json
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from src.generators.chart_generator import PriceData
+from src.utils.cache import TTLCache
+from src.utils.singleflight import SingleFlight
+
+# ----- Constants -----
+# Cards show the time to the minute, so one card is reused within a minute
+CARD_CACHE_BUCKET_SECONDS = 60
+CARD_CACHE_MAX_ENTRIES = 4096
+
+def series_digest(price_data: List[PriceData], current_price: float) -> str:
+    """Short hash of everything a card is drawn from besides the gift, range and time"""
+    payload = json.dumps([[point["listed_at"], point["priceUsd"]] for point in price_data] + [current_price])
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+class CardCache:
+    """
+    Telegram file_ids of recently sent cards.
+
+    A card is keyed by gift, range, a digest of its data and a time bucket.
+    The first request renders and uploads the card and keeps the file_id
+    Telegram returns; identical requests in the same bucket resend that id,
+    and ones arriving while the first is still uploading wait for it. A
+    file_id Telegram rejects is popped so the card is uploaded again.
+    """
+
+    def __init__(self, bucket_seconds: float = CARD_CACHE_BUCKET_SECONDS, max_entries: int = CARD_CACHE_MAX_ENTRIES):
+        self.bucket_seconds = bucket_seconds
+        self._file_ids = TTLCache(default_ttl=bucket_seconds, max_entries=max_entries)
+        self._inflight = SingleFlight()
+
+    def key(
+        self,
+        gift_name: str,
+        time_range: str,
+        price_data: List[PriceData],
+        current_price: float,
+        now: Optional[float] = None,
+    ) -> Tuple[Hashable, ...]:
+        """Cache key of the card for this data in the current time bucket"""
+        bucket = int((time.time() if now is None else now) // self.bucket_seconds)
+        return (gift_name, time_range, series_digest(price_data, current_price), bucket)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Get the file_id of a sent card"""
+        return self._file_ids.get(key)
+
+    def pop(self, key: Hashable) -> None:
+        """Forget a card, e.g. when Telegram rejects its file_id"""
+        self._file_ids.pop(key)
+
+    async def get_or_upload(
+        self,
+        key: Hashable,
+        upload: Callable[[], Awaitable[Optional[str]]],
+    ) -> Optional[str]:
+        """
+        Get a card's file_id, uploading the card if it is not cached.
+
+        Concurrent callers wait for the first one's upload. Its upload goes to
+        its own chat, so if it fails (e.g. that user blocked the bot) the
+        others upload the card themselves instead of sharing the error.
+
+        Args:
+            key: Card key from key()
+            upload: Renders and sends the card to the caller's chat and returns
+                its file_id
+
+        Returns:
+            file_id of the card, or None if it could not be rendered or sent
+        """
+        file_id = self.get(key)
+        if file_id is not None:
+            return file_id
+
+        leader = False
+
+        async def upload_once() -> Optional[str]:
+            nonlocal leader
+            leader = True
+            return await self._upload(key, upload)
+
+        try:
+            file_id = await self._inflight.do(key, upload_once)
+        except Exception:
+            if leader:
+                raise
+            file_id = None
+        if file_id is None and not leader:
+            return await self._upload(key, upload)
+        return file_id
+
+    async def _upload(self, key: Hashable, upload: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        file_id = await upload()
+        if file_id is not None:
+            self._file_ids.set(key, file_id)
+        return file_id
+
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters of the file_id cache"""
+        return self._file_ids.stats()
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from src.api.api_client import AuthData, PortalsClient, result_cache
+from src.api.ingestion import refresh_gift
+from src.database.database import get_top_requested_gifts, prune_gift_requests
+
+# ----- Constants -----
+POLL_INTERVAL_SECONDS = 30
+POLL_TOP_GIFTS = 10
+POLL_CONCURRENCY = 3
+POPULARITY_WINDOW_HOURS = 24
+
+class MarketPoller:
+    """
+    Background scheduler that keeps the most requested gifts warm.
+    
+    Every interval it picks the gifts users asked for most within the
+    popularity window and refreshes their price history and current price,
+    so user requests for them are served from the local store.
+    """
+
+    def __init__(
+        self,
+        auth_data: AuthData,
+        client: Optional[PortalsClient] = None,
+        interval: float = POLL_INTERVAL_SECONDS,
+        top_gifts: int = POLL_TOP_GIFTS,
+        concurrency: int = POLL_CONCURRENCY,
+        popularity_window_hours: float = POPULARITY_WINDOW_HOURS,
+    ):
+        self.auth_data = auth_data
+        self.client = client
+        self.interval = interval
+        self.top_gifts = top_gifts
+        self.popularity_window_hours = popularity_window_hours
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start polling in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling and wait for the current cycle to finish"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def poll_once(self) -> List[str]:
+        """Refresh the currently most requested gifts once"""
+        since = datetime.now() - timedelta(hours=self.popularity_window_hours)
+        await asyncio.to_thread(prune_gift_requests, since.timestamp())
+        gifts = await asyncio.to_thread(get_top_requested_gifts, since.timestamp(), self.top_gifts)
+        await asyncio.gather(*(self._refresh(gift_name) for gift_name in gifts))
+        return gifts
+
+    async def _refresh(self, gift_name: str) -> None:
+        async with self._semaphore:
+            try:
+                await refresh_gift(gift_name, self.auth_data, self.client)
+            except Exception as e:
+                logging.error(f"Error refreshing {gift_name} in poller: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                gifts = await self.poll_once()
+                if gifts:
+                    logging.info(f"Poller refreshed {len(gifts)} gifts, cache: {result_cache.stats()}")
+            except Exception as e:
+                logging.error(f"Error in market poller: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from src.api.api_client import AuthData, PortalsClient
+from src.api.ingestion import SWEEP_CONCURRENCY, sweep_market
+from src.utils.gift_catalog import get_catalog
+
+# ----- Constants -----
+SWEEP_INTERVAL_SECONDS = 15 * 60
+
+class MarketSweeper:
+    """
+    Background scheduler that refreshes the whole market.
+
+    Every interval it stores the floor price of every known gift from one
+    bulk request and ingests their recent listings, so overviews are always
+    available and a user rarely hits a gift with a cold cache.
+    """
+
+    def __init__(
+        self,
+        auth_data: AuthData,
+        gift_names: Optional[List[str]] = None,
+        client: Optional[PortalsClient] = None,
+        interval: float = SWEEP_INTERVAL_SECONDS,
+        concurrency: int = SWEEP_CONCURRENCY,
+    ):
+        self.auth_data = auth_data
+        self.gift_names = gift_names
+        self.client = client
+        self.interval = interval
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start sweeping in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sweeping"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _gift_names(self) -> List[str]:
+        # Without an explicit list, every gift in the (hot-reloaded) catalog is swept
+        return self.gift_names if self.gift_names is not None else list(get_catalog().names)
+
+    async def sweep_once(self) -> Dict[str, float]:
+        """Refresh every gift once"""
+        return await sweep_market(self._gift_names(), self.auth_data, self.client, self.concurrency)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                floors = await self.sweep_once()
+                logging.info(f"Market sweep stored {len(floors)} floor prices")
+            except Exception as e:
+                logging.error(f"Error in market sweep: {e}")
+            await asyncio.sleep(self.interval)
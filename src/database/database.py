@@ -1,10 +1,17 @@
 import sqlite3
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# ----- Constants -----
+DB_PATH = 'bot.db'
+
+# ----- Type Aliases -----
+Listing = Tuple[int, float]  # (listed_at in epoch milliseconds, price)
+Rollup = Tuple[int, float, float, float, int]  # (bucket_start in epoch ms, min, max, close, count)
 
 def init_db():
     """Initialize the database with required tables"""
-    conn = sqlite3.connect('bot.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
     # Create table for rate limiting
@@ -15,12 +22,81 @@ def init_db():
         )
     ''')
     
+    # Create tables for ingested price history
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS price_listings (
+            gift_name TEXT NOT NULL,
+            listed_at INTEGER NOT NULL,
+            price REAL NOT NULL,
+            UNIQUE (gift_name, listed_at, price)
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_price_listings_gift_time
+        ON price_listings (gift_name, listed_at)
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_watermarks (
+            gift_name TEXT PRIMARY KEY,
+            newest_listed_at INTEGER NOT NULL
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_coverage (
+            gift_name TEXT PRIMARY KEY,
+            covered_since INTEGER NOT NULL
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS price_rollups (
+            gift_name TEXT NOT NULL,
+            resolution INTEGER NOT NULL,
+            bucket_start INTEGER NOT NULL,
+            min_price REAL NOT NULL,
+            max_price REAL NOT NULL,
+            close_price REAL NOT NULL,
+            close_at INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (gift_name, resolution, bucket_start)
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS current_prices (
+            gift_name TEXT PRIMARY KEY,
+            price REAL NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS floor_history (
+            gift_name TEXT NOT NULL,
+            price REAL NOT NULL,
+            recorded_at TIMESTAMP NOT NULL
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_floor_history_gift_time
+        ON floor_history (gift_name, recorded_at)
+    ''')
+    
+    # Create table for gift request frequency
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS gift_requests (
+            gift_name TEXT NOT NULL,
+            requested_at TIMESTAMP NOT NULL
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_gift_requests_time
+        ON gift_requests (requested_at)
+    ''')
+    
     conn.commit()
     conn.close()
 
 def update_last_success(user_id: int) -> None:
     """Update the last successful request time for a user"""
-    conn = sqlite3.connect('bot.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
     c.execute('''
@@ -33,11 +109,297 @@ def update_last_success(user_id: int) -> None:
 
 def get_last_success_time(user_id: int) -> Optional[float]:
     """Get the last successful request time for a user"""
-    conn = sqlite3.connect('bot.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
     c.execute('SELECT last_success_time FROM rate_limits WHERE user_id = ?', (user_id,))
     result = c.fetchone()
     
     conn.close()
-    return result[0] if result else None 
\ No newline at end of file
+    return result[0] if result else None
+
+def get_watermark(gift_name: str) -> Optional[int]:
+    """Get the newest listed_at (epoch ms) ingested for a gift"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('SELECT newest_listed_at FROM ingest_watermarks WHERE gift_name = ?', (gift_name,))
+    result = c.fetchone()
+    
+    conn.close()
+    return result[0] if result else None
+
+def get_coverage(gift_name: str) -> Optional[int]:
+    """Get the oldest listed_at (epoch ms) from which every listing of a gift has been ingested"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('SELECT covered_since FROM ingest_coverage WHERE gift_name = ?', (gift_name,))
+    result = c.fetchone()
+    
+    conn.close()
+    return result[0] if result else None
+
+def clear_listings(gift_name: str) -> None:
+    """Delete a gift's stored listings, rollups, watermark and coverage in one transaction"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('DELETE FROM price_listings WHERE gift_name = ?', (gift_name,))
+    c.execute('DELETE FROM price_rollups WHERE gift_name = ?', (gift_name,))
+    c.execute('DELETE FROM ingest_watermarks WHERE gift_name = ?', (gift_name,))
+    c.execute('DELETE FROM ingest_coverage WHERE gift_name = ?', (gift_name,))
+    
+    conn.commit()
+    conn.close()
+
+def _aggregate_listings(listings: List[Listing], resolution: int) -> List[Tuple[int, float, float, float, int, int]]:
+    """Aggregate listings into (bucket_start, min, max, close, close_at, count) rows for a resolution in seconds"""
+    bucket_ms = resolution * 1000
+    buckets: Dict[int, List] = {}
+    for listed_at, price in listings:
+        bucket_start = listed_at - listed_at % bucket_ms
+        bucket = buckets.get(bucket_start)
+        if bucket is None:
+            buckets[bucket_start] = [price, price, price, listed_at, 1]
+            continue
+        bucket[0] = min(bucket[0], price)
+        bucket[1] = max(bucket[1], price)
+        if listed_at >= bucket[3]:
+            bucket[2], bucket[3] = price, listed_at
+        bucket[4] += 1
+    return [(start, b[0], b[1], b[2], b[3], b[4]) for start, b in buckets.items()]
+
+def store_listings(
+    gift_name: str,
+    listings: List[Listing],
+    watermark: Optional[int],
+    rollup_resolutions: Sequence[int] = (),
+    covered_since: Optional[int] = None
+) -> int:
+    """
+    Store new listings for a gift, fold them into its rollups and advance its
+    watermark and coverage in one transaction. Listings already stored are
+    skipped so they are never counted twice in a rollup.
+    
+    Returns:
+        Number of listings actually inserted
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    inserted: List[Listing] = []
+    for listed_at, price in listings:
+        c.execute('''
+            INSERT OR IGNORE INTO price_listings (gift_name, listed_at, price)
+            VALUES (?, ?, ?)
+        ''', (gift_name, listed_at, price))
+        if c.rowcount:
+            inserted.append((listed_at, price))
+    
+    for resolution in rollup_resolutions:
+        c.executemany('''
+            INSERT INTO price_rollups (gift_name, resolution, bucket_start, min_price, max_price, close_price, close_at, count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(gift_name, resolution, bucket_start) DO UPDATE SET
+                min_price = MIN(min_price, excluded.min_price),
+                max_price = MAX(max_price, excluded.max_price),
+                close_price = CASE WHEN excluded.close_at >= close_at THEN excluded.close_price ELSE close_price END,
+                close_at = MAX(close_at, excluded.close_at),
+                count = count + excluded.count
+        ''', [(gift_name, resolution) + row for row in _aggregate_listings(inserted, resolution)])
+    
+    if watermark is not None:
+        c.execute('''
+            INSERT INTO ingest_watermarks (gift_name, newest_listed_at)
+            VALUES (?, ?)
+            ON CONFLICT(gift_name) DO UPDATE SET
+                newest_listed_at = MAX(newest_listed_at, excluded.newest_listed_at)
+        ''', (gift_name, watermark))
+    
+    if covered_since is not None:
+        c.execute('''
+            INSERT OR REPLACE INTO ingest_coverage (gift_name, covered_since)
+            VALUES (?, ?)
+        ''', (gift_name, covered_since))
+    
+    conn.commit()
+    conn.close()
+    return len(inserted)
+
+def get_listings(gift_name: str, since: int, until: int) -> List[Listing]:
+    """Get stored listings for a gift between two epoch ms timestamps, oldest first"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('''
+        SELECT listed_at, price FROM price_listings
+        WHERE gift_name = ? AND listed_at >= ? AND listed_at <= ?
+        ORDER BY listed_at
+    ''', (gift_name, since, until))
+    result = c.fetchall()
+    
+    conn.close()
+    return result
+
+def get_rollups(gift_name: str, resolution: int, since: int, until: int) -> List[Rollup]:
+    """Get rollup buckets for a gift and resolution between two epoch ms timestamps, oldest first"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('''
+        SELECT bucket_start, min_price, max_price, close_price, count FROM price_rollups
+        WHERE gift_name = ? AND resolution = ? AND bucket_start >= ? AND bucket_start <= ?
+        ORDER BY bucket_start
+    ''', (gift_name, resolution, since, until))
+    result = c.fetchall()
+    
+    conn.close()
+    return result
+
+def prune_rollups(resolution: int, before: int) -> None:
+    """Delete rollup buckets of a resolution that start before an epoch ms timestamp"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('DELETE FROM price_rollups WHERE resolution = ? AND bucket_start < ?', (resolution, before))
+    
+    conn.commit()
+    conn.close()
+
+def prune_listings(before: int) -> None:
+    """Delete stored listings older than an epoch ms timestamp"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('DELETE FROM price_listings WHERE listed_at < ?', (before,))
+    
+    conn.commit()
+    conn.close()
+
+def store_current_price(gift_name: str, price: float) -> None:
+    """Store the latest known current price for a gift and keep it in its floor history"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    updated_at = datetime.now().timestamp()
+    c.execute('''
+        INSERT OR REPLACE INTO current_prices (gift_name, price, updated_at)
+        VALUES (?, ?, ?)
+    ''', (gift_name, price, updated_at))
+    c.execute('''
+        INSERT INTO floor_history (gift_name, price, recorded_at)
+        VALUES (?, ?, ?)
+    ''', (gift_name, price, updated_at))
+    
+    conn.commit()
+    conn.close()
+
+def store_current_prices(prices: Dict[str, float]) -> None:
+    """Store the latest known current prices for many gifts in one transaction"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    updated_at = datetime.now().timestamp()
+    rows = [(gift_name, price, updated_at) for gift_name, price in prices.items()]
+    c.executemany('''
+        INSERT OR REPLACE INTO current_prices (gift_name, price, updated_at)
+        VALUES (?, ?, ?)
+    ''', rows)
+    c.executemany('''
+        INSERT INTO floor_history (gift_name, price, recorded_at)
+        VALUES (?, ?, ?)
+    ''', rows)
+    
+    conn.commit()
+    conn.close()
+
+def get_current_prices() -> Dict[str, Tuple[float, float]]:
+    """Get the stored current price of every gift as {gift_name: (price, updated_at)}"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('SELECT gift_name, price, updated_at FROM current_prices')
+    result = {gift_name: (price, updated_at) for gift_name, price, updated_at in c.fetchall()}
+    
+    conn.close()
+    return result
+
+def get_past_floors(at: float) -> Dict[str, float]:
+    """Get each gift's floor as it was at a timestamp: its latest floor history entry at or before it"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('''
+        SELECT f.gift_name, f.price FROM floor_history f
+        JOIN (
+            SELECT gift_name, MAX(recorded_at) AS last_recorded FROM floor_history
+            WHERE recorded_at <= ?
+            GROUP BY gift_name
+        ) l ON f.gift_name = l.gift_name AND f.recorded_at = l.last_recorded
+    ''', (at,))
+    result = dict(c.fetchall())
+    
+    conn.close()
+    return result
+
+def prune_floor_history(before: float) -> None:
+    """Delete floor history recorded before a timestamp"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('DELETE FROM floor_history WHERE recorded_at < ?', (before,))
+    
+    conn.commit()
+    conn.close()
+
+def get_stored_current_price(gift_name: str) -> Optional[Tuple[float, float]]:
+    """Get the stored current price for a gift as (price, updated_at)"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('SELECT price, updated_at FROM current_prices WHERE gift_name = ?', (gift_name,))
+    result = c.fetchone()
+    
+    conn.close()
+    return (result[0], result[1]) if result else None
+
+def record_gift_request(gift_name: str) -> None:
+    """Record that a user requested a gift chart"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('''
+        INSERT INTO gift_requests (gift_name, requested_at)
+        VALUES (?, ?)
+    ''', (gift_name, datetime.now().timestamp()))
+    
+    conn.commit()
+    conn.close()
+
+def get_top_requested_gifts(since: float, limit: int) -> List[str]:
+    """Get the most requested gift names since a timestamp, most requested first"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('''
+        SELECT gift_name FROM gift_requests
+        WHERE requested_at >= ?
+        GROUP BY gift_name
+        ORDER BY COUNT(*) DESC
+        LIMIT ?
+    ''', (since, limit))
+    result = [row[0] for row in c.fetchall()]
+    
+    conn.close()
+    return result
+
+def prune_gift_requests(before: float) -> None:
+    """Delete gift request records older than a timestamp"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('DELETE FROM gift_requests WHERE requested_at < ?', (before,))
+    
+    conn.commit()
+    conn.close()
@@ -1,14 +1,16 @@
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import os
 from datetime import datetime
 import random
-import colorsys
+from functools import lru_cache
 from typing import Optional
-from src.utils.gift_image_utils import get_gift_id_by_name, fetch_gift_image_by_id
+from src.generators.fonts import get_font
+from src.utils.gift_image_utils import get_gift_id_by_name, get_gift_image
 
 # ----- Constants -----
 CARD_SIZE = (1119, 645)
 BG_SIZE = (1280, 800)
+CARD_POS = ((BG_SIZE[0] - CARD_SIZE[0]) // 2, (BG_SIZE[1] - CARD_SIZE[1]) // 2)
 CARD_RADIUS = 69
 CARD_COLOR = (255, 255, 255, 255)
 
@@ -19,6 +21,7 @@ STARS_FONT_SIZE = 40
 USD_FONT_SIZE = 40
 TIME_FONT_SIZE = 18
 PERCENT_FONT_SIZE = 36
+WATERMARK_FONT_SIZE = 50
 
 # Colors
 TITLE_COLOR = "#3B3B3B"
@@ -38,6 +41,11 @@ STARS_LABEL_POS = (375, 290)
 CHART_MARGIN = 120
 CHART_HEIGHT = 180
 CHART_BOTTOM_MARGIN = 220
+# Size and position the chart is rendered at
+CHART_SIZE = (CARD_SIZE[0] - CHART_MARGIN, CHART_HEIGHT)
+CHART_POS = (60, CARD_SIZE[1] - CHART_BOTTOM_MARGIN)
+
+WATERMARK_TEXT = "@GiftChartBot"
 
 # Frame settings
 FRAME_SIZE = (140, 50)
@@ -76,11 +84,60 @@ def hex_to_rgb(hex_color):
     hex_color = hex_color.lstrip('#')
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
-def random_backdrop_pair():
-    color = random.choice([c for c in BACKDROP_COLORS if "hex" in c])
-    center = hex_to_rgb(color["hex"]["centerColor"])
-    edge = hex_to_rgb(color["hex"]["edgeColor"])
-    return center, edge
+def _rounded_mask(size, radius):
+    mask = Image.new("L", size, 0)
+    ImageDraw.Draw(mask).rounded_rectangle([0, 0, size[0], size[1]], radius, fill=255)
+    return mask
+
+def find_backdrop(name):
+    for backdrop in BACKDROP_COLORS:
+        if backdrop["name"] == name:
+            return backdrop
+    raise ValueError(f"Unknown backdrop: {name}")
+
+@lru_cache(maxsize=None)
+def get_card_template(backdrop_name: str, asset_dir: str = "src/assets") -> Image.Image:
+    """
+    Build the static part of a card once per backdrop: the gradient background
+    with the watermark, and the rounded white card with the TON icon and the
+    percentage frame composited onto it.
+    
+    The returned image is shared; draw on a copy.
+    """
+    backdrop = find_backdrop(backdrop_name)
+    color1 = hex_to_rgb(backdrop["hex"]["centerColor"])
+    color2 = hex_to_rgb(backdrop["hex"]["edgeColor"])
+    bg = draw_gradient(BG_SIZE, color1, color2)
+
+    # ----- Add watermark -----
+    watermark_font = get_font(WATERMARK_FONT_SIZE)
+    bg_draw = ImageDraw.Draw(bg)
+    watermark_width, _ = get_text_size(bg_draw, WATERMARK_TEXT, watermark_font)
+    watermark_x = (BG_SIZE[0] - watermark_width) // 2
+    watermark_y = 10
+    bg_draw.text((watermark_x, watermark_y), WATERMARK_TEXT, font=watermark_font, fill=(255, 255, 255))
+
+    # ----- Create card with rounded corners -----
+    card = Image.new("RGB", CARD_SIZE, CARD_COLOR[:3])
+
+    # ----- Add TON icon -----
+    ton_icon = Image.open(os.path.join(asset_dir, "ton.png")).convert("RGBA").resize(TON_ICON_SIZE)
+    card.paste(ton_icon, TON_ICON_POS, ton_icon)
+
+    # ----- Add percentage frame -----
+    frame_x = CARD_SIZE[0] - FRAME_SIZE[0] - FRAME_MARGIN
+    frame_y = FRAME_MARGIN
+    frame = Image.new("RGB", FRAME_SIZE, (255, 255, 255))
+    card.paste(frame, (frame_x, frame_y), _rounded_mask(FRAME_SIZE, FRAME_RADIUS))
+
+    # ----- Compose base image -----
+    bg.paste(card, CARD_POS, _rounded_mask(CARD_SIZE, CARD_RADIUS))
+    return bg
+
+def warm_card_templates(asset_dir: str = "src/assets") -> None:
+    """Build the template of every backdrop ahead of the first card"""
+    for backdrop in BACKDROP_COLORS:
+        get_card_template(backdrop["name"], asset_dir)
 
 def draw_card(
     gift_name: str,
@@ -89,76 +146,64 @@ def draw_card(
     dt: datetime,
     asset_dir: str = "src/assets",
     gift_image_filename: Optional[str] = None,
-    percent_change: float = 0.0
+    percent_change: float = 0.0,
+    backdrop_name: Optional[str] = None
 ):
-    card_pos = ((BG_SIZE[0] - CARD_SIZE[0]) // 2, (BG_SIZE[1] - CARD_SIZE[1]) // 2)
+    # ----- Start from the static template of a random backdrop -----
+    if backdrop_name is None:
+        backdrop_name = random.choice(BACKDROP_COLORS)["name"]
+    bg = get_card_template(backdrop_name, asset_dir).copy()
+    draw = ImageDraw.Draw(bg)
 
-    # ----- Generate background -----
-    color1, color2 = random_backdrop_pair()
-    bg = draw_gradient(BG_SIZE, color1, color2).convert("RGBA")
+    def at(pos):
+        # Card coordinates to image coordinates
+        return (CARD_POS[0] + pos[0], CARD_POS[1] + pos[1])
 
     # ----- Load fonts -----
-    font_dir = "/Library/Fonts" if os.path.exists("/Library/Fonts") else ""
-    font_path = os.path.join(font_dir, "SF-Pro-Rounded-Black.otf")
-    try:
-        Title_Font = ImageFont.truetype(font_path, TITLE_FONT_SIZE)
-        TON_Font = ImageFont.truetype(font_path, TON_FONT_SIZE)
-        Stars_Font = ImageFont.truetype(font_path, STARS_FONT_SIZE)
-        USD_Font = ImageFont.truetype(font_path, USD_FONT_SIZE)
-        Time_Font = ImageFont.truetype(font_path, TIME_FONT_SIZE)
-        Percent_Font = ImageFont.truetype(font_path, PERCENT_FONT_SIZE)
-    except:
-        Title_Font = TON_Font = Stars_Font = USD_Font = Time_Font = Percent_Font = ImageFont.load_default()
-
-    # ----- Create card with rounded corners -----
-    card = Image.new("RGBA", CARD_SIZE, 0)
-    mask = Image.new("L", CARD_SIZE, 0)
-    draw_mask = ImageDraw.Draw(mask)
-    draw_mask.rounded_rectangle([0, 0, CARD_SIZE[0], CARD_SIZE[1]], CARD_RADIUS, fill=255)
-    card_draw = ImageDraw.Draw(card)
-    card_draw.rectangle([0, 0, CARD_SIZE[0], CARD_SIZE[1]], fill=CARD_COLOR)
-    card.putalpha(mask)
+    Title_Font = get_font(TITLE_FONT_SIZE)
+    TON_Font = get_font(TON_FONT_SIZE)
+    Stars_Font = get_font(STARS_FONT_SIZE)
+    USD_Font = get_font(USD_FONT_SIZE)
+    Time_Font = get_font(TIME_FONT_SIZE)
+    Percent_Font = get_font(PERCENT_FONT_SIZE)
 
     # ----- Add gift image -----
     gift_img = None
     gift_id = get_gift_id_by_name(gift_name)
     if gift_id:
-        gift_img = fetch_gift_image_by_id(gift_id)
+        gift_img = get_gift_image(gift_id, GIFT_IMAGE_SIZE)
     if gift_img is None and gift_image_filename:
         gift_img_path = os.path.join(asset_dir, gift_image_filename)
         if os.path.exists(gift_img_path):
-            gift_img = Image.open(gift_img_path).convert("RGBA")
+            gift_img = Image.open(gift_img_path).convert("RGBA").resize(GIFT_IMAGE_SIZE)
     if gift_img:
-        gift_img = gift_img.resize(GIFT_IMAGE_SIZE)
-        card.paste(gift_img, GIFT_IMAGE_POS, gift_img)
+        bg.paste(gift_img, at(GIFT_IMAGE_POS), gift_img)
 
     # ----- Add gift name -----
     display_name = gift_name.replace("-", " - ").title().replace(" - ", "-")
-    card_draw.text(TITLE_POS, display_name, font=Title_Font, fill=TITLE_COLOR)
+    draw.text(at(TITLE_POS), display_name, font=Title_Font, fill=TITLE_COLOR)
 
     # ----- Add TON and USD prices -----
-    ton_icon = Image.open(os.path.join(asset_dir, "ton.png")).convert("RGBA").resize(TON_ICON_SIZE)
-    card.paste(ton_icon, TON_ICON_POS, ton_icon)
-
     price_ton = round(price_stars * 0.0053, 2)
     ton_str = f"{price_ton}"
-    card_draw.text(TON_PRICE_POS, ton_str, font=TON_Font, fill=(20, 20, 20))
+    draw.text(at(TON_PRICE_POS), ton_str, font=TON_Font, fill=(20, 20, 20))
 
     price_usd = round(price_ton * 2.9, 2)
     usd_label = f"$ {price_usd}"
-    card_draw.text(USD_LABEL_POS, usd_label, font=USD_Font, fill=(20, 20, 20))
+    draw.text(at(USD_LABEL_POS), usd_label, font=USD_Font, fill=(20, 20, 20))
 
     stars_label = f"★ {price_stars}"
-    card_draw.text(STARS_LABEL_POS, stars_label, font=Stars_Font, fill=(20, 20, 20))
+    draw.text(at(STARS_LABEL_POS), stars_label, font=Stars_Font, fill=(20, 20, 20))
 
     # ----- Add price chart -----
-    chart_img = chart_img.resize((CARD_SIZE[0]-CHART_MARGIN, CHART_HEIGHT))
-    card.paste(chart_img, (60, CARD_SIZE[1]-CHART_BOTTOM_MARGIN), chart_img)
+    if chart_img.size != CHART_SIZE:
+        chart_img = chart_img.resize(CHART_SIZE)
+    bg.paste(chart_img, at(CHART_POS), chart_img)
 
     # ----- Add timestamp -----
     dt_str = dt.strftime("%d %b %Y • %H:%M UTC")
-    w, h = get_text_size(card_draw, dt_str, Time_Font)
-    card_draw.text(((CARD_SIZE[0]-w)//2, CARD_SIZE[1]-30), dt_str, font=Time_Font, fill=TIME_COLOR)
+    w, h = get_text_size(draw, dt_str, Time_Font)
+    draw.text(at(((CARD_SIZE[0]-w)//2, CARD_SIZE[1]-30)), dt_str, font=Time_Font, fill=TIME_COLOR)
 
     # ----- Add price change percentage -----
     percent_text = "0"
@@ -168,38 +213,13 @@ def draw_card(
         percent_text = f"{percent_value:+.2f}%"
         color = POSITIVE_CHANGE_COLOR if percent_value > 0 else NEGATIVE_CHANGE_COLOR
 
-    # ----- Add percentage frame -----
+    # ----- Add percentage text inside the template's frame -----
     frame_x = CARD_SIZE[0] - FRAME_SIZE[0] - FRAME_MARGIN
     frame_y = FRAME_MARGIN
-
-    frame_mask = Image.new("L", FRAME_SIZE, 0)
-    frame_mask_draw = ImageDraw.Draw(frame_mask)
-    frame_mask_draw.rounded_rectangle([0, 0, FRAME_SIZE[0], FRAME_SIZE[1]], radius=FRAME_RADIUS, fill=255)
-
-    frame = Image.new("RGBA", FRAME_SIZE, 0)
-    frame_draw = ImageDraw.Draw(frame)
-    frame_draw.rounded_rectangle([0, 0, FRAME_SIZE[0], FRAME_SIZE[1]], radius=FRAME_RADIUS, fill=(255, 255, 255, 255))
-    
-    card.paste(frame, (frame_x, frame_y), frame_mask)
-
-    # ----- Add percentage text -----
-    text_w, text_h = get_text_size(card_draw, percent_text, Percent_Font)
+    text_w, text_h = get_text_size(draw, percent_text, Percent_Font)
     text_x = frame_x + (FRAME_SIZE[0] - text_w) / 2
     text_y = frame_y + (FRAME_SIZE[1] - text_h) / 2 - 2
 
-    card_draw.text((text_x, text_y), percent_text, font=Percent_Font, fill=color)
-
-    # ----- Add watermark -----
-    watermark_text = "@GiftChartBot"
-    watermark_font = ImageFont.truetype(font_path, 50)
-    watermark_bbox = draw_mask.textbbox((0, 0), watermark_text, font=watermark_font)
-    watermark_width = watermark_bbox[2] - watermark_bbox[0]
-    watermark_x = (BG_SIZE[0] - watermark_width) // 2
-    watermark_y = 10
-    bg_draw = ImageDraw.Draw(bg)
-    bg_draw.text((watermark_x, watermark_y), watermark_text, font=watermark_font, fill=(255, 255, 255))
-
-    # ----- Compose final image -----
-    bg.alpha_composite(card, card_pos)
+    draw.text(at((text_x, text_y)), percent_text, font=Percent_Font, fill=color)
 
-    return bg
\ No newline at end of file
+    return bg
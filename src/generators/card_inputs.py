@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, cast
+
+from src.generators.chart_generator import DATE_FORMAT, TIME_LABEL_FORMAT, PriceData
+
+# ----- Type Aliases -----
+# What a card is drawn from besides the gift and time: (chart points, price in stars, percent change)
+CardInputs = Tuple[List[PriceData], int, float]
+
+# ----- Constants -----
+TON_TO_STARS = 0.0053
+
+# Chart time labels per range; ranges not listed use TIME_LABEL_FORMAT
+RANGE_TIME_LABEL_FORMATS: Dict[str, str] = {
+    "7d": "%d %b",
+    "30d": "%d %b",
+}
+
+def range_time_label_format(time_range: str) -> str:
+    """strftime format for the chart time labels of a range"""
+    return RANGE_TIME_LABEL_FORMATS.get(time_range, TIME_LABEL_FORMAT)
+
+def card_inputs(
+    history: Sequence[Mapping[str, Any]],
+    current_price: float,
+    now: Optional[datetime] = None,
+) -> CardInputs:
+    """
+    Build what a card is drawn from out of a time-sorted history and the current floor.
+
+    Args:
+        history: Time-sorted {priceUsd, listed_at} points
+        current_price: Current floor price in TON
+        now: Time the current price is stamped with, defaults to now
+
+    Returns:
+        Chart points ending with the current price, the price in stars, and
+        the change of the current price against the highest price charted
+    """
+    price_data: List[PriceData] = [
+        cast(PriceData, {"priceUsd": float(point["priceUsd"]), "listed_at": str(point["listed_at"])})
+        for point in history
+    ]
+    if price_data and price_data[-1]["priceUsd"] != current_price:
+        now = now or datetime.now(timezone.utc)
+        price_data.append(cast(PriceData, {"priceUsd": current_price, "listed_at": now.strftime(DATE_FORMAT)}))
+
+    percent_change = 0.0
+    if len(price_data) > 1:
+        max_price = max(point["priceUsd"] for point in price_data)
+        percent_change = (current_price - max_price) / max_price * 100
+    return price_data, int(current_price / TON_TO_STARS), percent_change
@@ -1,32 +1,32 @@
-from PIL import Image, ImageDraw, ImageFont
-import random
+from PIL import Image, ImageDraw
+import numpy as np
 from datetime import datetime, timezone, timedelta
 import os
 from typing import List, Dict, Tuple, Optional, Union, TypedDict
 
+from src.generators.fonts import FALLBACK_FONT_PATH, get_font
+
 # ----- Type Aliases -----
 class PriceData(TypedDict):
     priceUsd: float
     listed_at: str
 
 # ----- Constants -----
-FONT_PATH = "/System/Library/Fonts/SF-Pro-Rounded-Black.otf"
-FALLBACK_FONT_PATH = "/System/Library/Fonts/SFNSDisplay.ttf"
-
-PRICE_FONT_SIZE = 20
-TIME_FONT_SIZE = 16
+# Sizes are in pixels of the chart as it appears on the card (999x180)
+PRICE_FONT_SIZE = 15
+TIME_FONT_SIZE = 13
 
 GREEN_COLOR = (46, 204, 113)
 RED_COLOR = (231, 76, 60)
 TIME_LABEL_COLOR = "#7C7C7C"
 
-LEFT_PADDING = 80
-RIGHT_PADDING = 150
-BOTTOM_PADDING = 25
-TOP_PADDING = 50
+LEFT_PADDING = 53
+RIGHT_PADDING = 100
+BOTTOM_PADDING = 20
+TOP_PADDING = 41
 
-LINE_WIDTH = 7
-MARKER_SIZE = 7
+LINE_WIDTH = 5
+MARKER_SIZE = 5
 FILL_OPACITY = 15
 MARKER_OUTER_OPACITY = 220
 PRICE_LABEL_OFFSET = 20
@@ -37,6 +37,33 @@ TIME_RANDOM_OFFSET = (-10, 10)
 DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
 TIME_LABEL_FORMAT = '%H:%M'
 
+# Supersampling factor for anti-aliasing; 1 draws at the target size
+DEFAULT_SUPERSAMPLE = 1
+
+def _column_extrema(ys: np.ndarray, columns: int) -> np.ndarray:
+    """
+    Indices of the points worth drawing when there are more points than pixel columns.
+
+    Points are split into one bucket per column and each keeps its first,
+    last, lowest and highest point, so the drawn line has the same shape,
+    spikes included, while its length is bounded by the chart width.
+    """
+    num_points = len(ys)
+    if columns <= 0 or num_points <= columns * 4:
+        return np.arange(num_points)
+
+    indices = np.arange(num_points)
+    buckets = indices * columns // num_points
+    starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+    counts = np.diff(np.append(starts, num_points))
+
+    lows = np.repeat(np.minimum.reduceat(ys, starts), counts)
+    highs = np.repeat(np.maximum.reduceat(ys, starts), counts)
+    low_idx = np.minimum.reduceat(np.where(ys == lows, indices, num_points), starts)
+    high_idx = np.minimum.reduceat(np.where(ys == highs, indices, num_points), starts)
+
+    return np.unique(np.concatenate((starts, starts + counts - 1, low_idx, high_idx)))
+
 def generate_chart_image(
     width: int,
     height: int,
@@ -46,6 +73,8 @@ def generate_chart_image(
     font_size: int = 40,
     time_font_path: str = FALLBACK_FONT_PATH,
     time_font_size: int = 20,
+    time_label_format: str = TIME_LABEL_FORMAT,
+    supersample: int = DEFAULT_SUPERSAMPLE,
 ) -> Optional[Image.Image]:
     """
     Generate a price chart image.
@@ -59,65 +88,63 @@ def generate_chart_image(
         font_size: Font size for price labels
         time_font_path: Path to font file for time labels
         time_font_size: Font size for time labels
+        time_label_format: strftime format for time labels
+        supersample: Draw at this multiple of the size and downscale, for
+            smoother lines at the cost of render time (1 to disable)
         
     Returns:
         PIL Image object or None if error occurs
     """
     # ----- Create base image -----
+    scale = max(1, int(supersample))
+    out_size = (width, height)
+    width, height = width * scale, height * scale
+    left_padding = LEFT_PADDING * scale
+    right_padding = RIGHT_PADDING * scale
+    bottom_padding = BOTTOM_PADDING * scale
+    top_padding = TOP_PADDING * scale
+    line_width = LINE_WIDTH * scale
+    marker_size = MARKER_SIZE * scale
+
     chart_img = Image.new('RGBA', (width, height))
     draw = ImageDraw.Draw(chart_img)
 
     # ----- Load fonts -----
-    try:
-        price_font = ImageFont.truetype(FONT_PATH, PRICE_FONT_SIZE)
-        time_font = ImageFont.truetype(FONT_PATH, TIME_FONT_SIZE)
-    except Exception as e:
-        print(f"Error loading font {FONT_PATH}: {e}")
-        try:
-            price_font = ImageFont.truetype(FALLBACK_FONT_PATH, PRICE_FONT_SIZE)
-            time_font = ImageFont.truetype(FALLBACK_FONT_PATH, TIME_FONT_SIZE)
-        except Exception as e:
-            print(f"Error loading fallback font: {e}")
-            return None
+    price_font = get_font(PRICE_FONT_SIZE * scale)
+    time_font = get_font(TIME_FONT_SIZE * scale)
 
     # ----- Generate or process data points -----
     if not chart_data:
-        num_points = 24
-        prices = [random.uniform(5, 15) for _ in range(num_points)]
-        times = [f"{i:02d}:00" for i in range(num_points)]
+        prices = np.random.uniform(5, 15, 24)
     else:
-        prices = [float(point["priceUsd"]) for point in chart_data]
-        times = [point["listed_at"] for point in chart_data]
+        prices = np.fromiter((point["priceUsd"] for point in chart_data), dtype=np.float64, count=len(chart_data))
 
     # ----- Calculate price change and set color -----
-    price_change = prices[-1] - prices[0] if prices else 0
+    price_change = prices[-1] - prices[0]
     color = GREEN_COLOR if price_change >= 0 else RED_COLOR
 
     # ----- Calculate price range and padding -----
-    min_price = min(prices) if prices else 0
-    max_price = max(prices) if prices else 0
+    max_price_idx = int(np.argmax(prices))
+    min_price_idx = int(np.argmin(prices))
+    max_price = float(prices[max_price_idx])
+    min_price = float(prices[min_price_idx])
     price_range = max_price - min_price
     padding = price_range * 0.1 if price_range > 0 else 1
     adjusted_min = min_price - padding
     adjusted_max = max_price + padding
     adjusted_range = adjusted_max - adjusted_min
 
-    max_price_idx = prices.index(max_price)
-    min_price_idx = prices.index(min_price)
-
     # ----- Calculate chart dimensions -----
     num_points = len(prices)
-    effective_width = width - LEFT_PADDING - RIGHT_PADDING
-    effective_height = height - TOP_PADDING - BOTTOM_PADDING
+    effective_width = width - left_padding - right_padding
+    effective_height = height - top_padding - bottom_padding
 
     # ----- Generate chart points -----
-    points = []
-    for i, price in enumerate(prices):
-        x = i * (effective_width / (num_points - 1)) + LEFT_PADDING
-        normalized_price = (price - adjusted_min) / adjusted_range if adjusted_range > 0 else 0.5
-        y = effective_height - (normalized_price * effective_height)
-        y = max(2, min(height - BOTTOM_PADDING - 2, y))
-        points.append((x, y))
+    xs = np.linspace(left_padding, left_padding + effective_width, num_points)
+    normalized = (prices - adjusted_min) / adjusted_range
+    ys = np.clip(effective_height - normalized * effective_height, 2 * scale, height - bottom_padding - 2 * scale)
+    keep = _column_extrema(ys, int(effective_width))
+    points = np.column_stack((xs[keep], ys[keep]))
 
     marker_points = [0]
     if num_points >= 8:
@@ -125,30 +152,31 @@ def generate_chart_image(
     marker_points.append(num_points - 1)
 
     # ----- Draw filled area under curve -----
-    fill_points = points.copy()
-    fill_points.append((points[-1][0], height))
-    fill_points.append((points[0][0], height))
+    fill_points = np.vstack((points, ((xs[-1], height), (xs[0], height))))
     fill_color = color + (FILL_OPACITY,)
-    draw.polygon(fill_points, fill=fill_color)
+    draw.polygon(fill_points.ravel().tolist(), fill=fill_color)
 
-    # ----- Draw line segments -----
-    for i in range(len(points) - 1):
-        draw.line([points[i], points[i+1]], fill=color, width=LINE_WIDTH)
+    # ----- Draw line -----
+    if num_points > 1:
+        # Rounded joints only show where segments are wider than the line;
+        # on denser lines neighbouring segments cover the corners anyway
+        joint = "curve" if len(points) - 1 <= effective_width / line_width else None
+        draw.line(points.ravel().tolist(), fill=color, width=line_width, joint=joint)
 
     # ----- Draw markers and price labels -----
     for idx in marker_points:
-        if idx < len(points):
-            x, y = points[idx]
-            draw.ellipse(
-                (x - MARKER_SIZE, y - MARKER_SIZE, x + MARKER_SIZE, y + MARKER_SIZE),
-                fill=(255, 255, 255, MARKER_OUTER_OPACITY),
-                outline=color
-            )
-            inner_size = MARKER_SIZE // 2
-            draw.ellipse(
-                (x - inner_size, y - inner_size, x + inner_size, y + inner_size),
-                fill=color
-            )
+        x, y = float(xs[idx]), float(ys[idx])
+        draw.ellipse(
+            (x - marker_size, y - marker_size, x + marker_size, y + marker_size),
+            fill=(255, 255, 255, MARKER_OUTER_OPACITY),
+            outline=color,
+            width=scale
+        )
+        inner_size = marker_size // 2
+        draw.ellipse(
+            (x - inner_size, y - inner_size, x + inner_size, y + inner_size),
+            fill=color
+        )
 
     # ----- Add time labels -----
     if chart_data and len(chart_data) >= 2:
@@ -160,10 +188,10 @@ def generate_chart_image(
         for i in range(num_labels):
             idx = min(int(i * step), len(chart_data) - 1)
             point_time = datetime.strptime(chart_data[idx]["listed_at"], DATE_FORMAT).replace(tzinfo=timezone.utc)
-            time_str = point_time.strftime(TIME_LABEL_FORMAT)
+            time_str = point_time.strftime(time_label_format)
             
-            x = LEFT_PADDING + (i * (effective_width / (num_labels - 1)))
-            x = max(LEFT_PADDING, min(x, width - RIGHT_PADDING - 10))
+            x = left_padding + (i * (effective_width / (num_labels - 1)))
+            x = max(left_padding, min(x, width - right_padding - 10 * scale))
             
             if time_str not in timestamp_positions:
                 timestamp_positions[time_str] = []
@@ -177,13 +205,13 @@ def generate_chart_image(
             text_height = bbox[3] - bbox[1]
             
             text_x = avg_x - text_width / 2
-            if text_x < LEFT_PADDING:
-                text_x = LEFT_PADDING
-            elif text_x + text_width > width - RIGHT_PADDING:
-                text_x = width - RIGHT_PADDING - text_width
+            if text_x < left_padding:
+                text_x = left_padding
+            elif text_x + text_width > width - right_padding:
+                text_x = width - right_padding - text_width
             
             draw.text(
-                (text_x, height - BOTTOM_PADDING + 5),
+                (text_x, height - bottom_padding + 5 * scale),
                 time_str,
                 fill=TIME_LABEL_COLOR,
                 font=time_font
@@ -191,14 +219,14 @@ def generate_chart_image(
 
     # ----- Add price labels for min and max points -----
     for idx, price, is_max in [(max_price_idx, max_price, True), (min_price_idx, min_price, False)]:
-        x, y = points[idx]
+        y = float(ys[idx])
         price_str = f"{price:.2f}" if price < 20 else f"{price:.1f}"
             
         bbox = draw.textbbox((0, 0), price_str, font=price_font)
         text_width = bbox[2] - bbox[0]
         text_height = bbox[3] - bbox[1]
         
-        text_x = width - RIGHT_PADDING + 10
+        text_x = width - right_padding + 10 * scale
         text_y = y - text_height/2
         
         draw.text(
@@ -208,4 +236,6 @@ def generate_chart_image(
             fill=TIME_LABEL_COLOR
         )
 
-    return chart_img
\ No newline at end of file
+    if scale > 1:
+        chart_img = chart_img.resize(out_size, Image.Resampling.LANCZOS)
+    return chart_img
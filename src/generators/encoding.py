@@ -0,0 +1,55 @@
+from io import BytesIO
+from typing import Dict, Tuple
+
+from PIL import Image
+
+# ----- Constants -----
+# Card formats: (Pillow format, file extension)
+IMAGE_FORMATS: Dict[str, Tuple[str, str]] = {
+    "png": ("PNG", "png"),
+    "jpeg": ("JPEG", "jpg"),
+    "webp": ("WEBP", "webp"),
+}
+DEFAULT_IMAGE_FORMAT = "png"
+# zlib level 1 is several times faster than Pillow's default of 6 for a
+# slightly larger file
+DEFAULT_PNG_COMPRESS_LEVEL = 1
+DEFAULT_QUALITY = 90
+
+def encode_image(
+    image: Image.Image,
+    image_format: str = DEFAULT_IMAGE_FORMAT,
+    quality: int = DEFAULT_QUALITY,
+    compress_level: int = DEFAULT_PNG_COMPRESS_LEVEL,
+) -> bytes:
+    """
+    Encode an image into an in-memory buffer.
+
+    Args:
+        image: Image to encode
+        image_format: One of IMAGE_FORMATS
+        quality: JPEG/WebP quality (1-100)
+        compress_level: PNG zlib level (0-9)
+
+    Returns:
+        Encoded image bytes
+
+    Raises:
+        ValueError: If image_format is unknown
+    """
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format: {image_format}")
+    pil_format = IMAGE_FORMATS[image_format][0]
+
+    buffer = BytesIO()
+    if pil_format == "PNG":
+        image.save(buffer, format=pil_format, compress_level=compress_level)
+    else:
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buffer, format=pil_format, quality=quality)
+    return buffer.getvalue()
+
+def image_filename(name: str, image_format: str = DEFAULT_IMAGE_FORMAT) -> str:
+    """File name with the extension of an image format, for uploads"""
+    return f"{name}.{IMAGE_FORMATS[image_format][1]}"
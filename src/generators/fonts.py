@@ -0,0 +1,74 @@
+import os
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+
+from PIL import ImageFont
+
+# ----- Type Aliases -----
+Font = Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]
+
+# ----- Constants -----
+FONT_NAME = "SF-Pro-Rounded-Black.otf"
+PRIMARY_FONT_PATH = f"/System/Library/Fonts/{FONT_NAME}"
+FALLBACK_FONT_PATH = "/System/Library/Fonts/SFNSDisplay.ttf"
+
+# Tried in order; bare file names are also searched in the system font dirs.
+# FONT_PATH in the environment is tried first.
+FONT_CANDIDATES: Tuple[str, ...] = (
+    f"/Library/Fonts/{FONT_NAME}",
+    PRIMARY_FONT_PATH,
+    FONT_NAME,
+    FALLBACK_FONT_PATH,
+    "DejaVuSans-Bold.ttf",
+)
+
+def _can_open(path: str) -> bool:
+    try:
+        ImageFont.truetype(path, 10)
+        return True
+    except OSError:
+        return False
+
+@lru_cache(maxsize=None)
+def resolve_font_path() -> Optional[str]:
+    """
+    Find the first usable card font, once per process.
+
+    Returns:
+        Path or file name of the font, or None if only Pillow's built-in font is available
+    """
+    override = os.getenv("FONT_PATH")
+    candidates = ((override,) if override else ()) + FONT_CANDIDATES
+    for path in candidates:
+        if _can_open(path):
+            return path
+    return None
+
+@lru_cache(maxsize=None)
+def get_font(size: int, path: Optional[str] = None) -> Font:
+    """
+    Get a shared font object, loading each (path, size) only once.
+
+    Args:
+        size: Font size in pixels
+        path: Font file, defaults to the resolved card font
+
+    Returns:
+        The loaded font, or Pillow's built-in font if no font file can be opened
+    """
+    font_path = path or resolve_font_path()
+    if font_path is not None:
+        try:
+            return ImageFont.truetype(font_path, size)
+        except OSError as e:
+            print(f"Error loading font {font_path}: {e}")
+    return ImageFont.load_default(size)
+
+def font_report() -> str:
+    """Describe which font cards are rendered with, for startup logs"""
+    path = resolve_font_path()
+    if path is None:
+        return "No font file found, using Pillow's built-in font"
+    if not path.endswith(FONT_NAME):
+        return f"{FONT_NAME} not found, using fallback font {path}"
+    return f"Using font {path}"
@@ -0,0 +1,152 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from src.generators.card_generator import CHART_SIZE, GIFT_IMAGE_SIZE, draw_card, warm_card_templates
+from src.generators.encoding import DEFAULT_IMAGE_FORMAT, DEFAULT_PNG_COMPRESS_LEVEL, DEFAULT_QUALITY, encode_image
+from src.generators.chart_generator import DATE_FORMAT, TIME_LABEL_FORMAT, PriceData, generate_chart_image
+from src.utils.gift_catalog import get_catalog
+from src.utils.gift_image_utils import preload_gift_images
+
+# ----- Constants -----
+ASSET_DIR = "assets"
+RENDER_WORKERS = os.cpu_count() or 1
+# spawn is the macOS default and avoids forking a process that runs threads
+START_METHOD = "spawn"
+
+def render_card(
+    gift_name: str,
+    price_data: List[PriceData],
+    price_stars: int,
+    percent_change: float,
+    dt: datetime,
+    time_label_format: str = TIME_LABEL_FORMAT,
+    asset_dir: str = ASSET_DIR,
+    image_format: str = DEFAULT_IMAGE_FORMAT,
+    quality: int = DEFAULT_QUALITY,
+    compress_level: int = DEFAULT_PNG_COMPRESS_LEVEL,
+) -> Optional[bytes]:
+    """
+    Render a gift's chart and price card and encode it in memory.
+
+    This is the whole CPU-bound part of a chart request, so it is what the
+    render pool runs; the result is encoded bytes to keep the cross-process
+    transfer small.
+
+    Args:
+        gift_name: Name of the gift
+        price_data: Time-sorted chart points
+        price_stars: Current price in stars
+        percent_change: Change against the highest price in the chart
+        dt: Time printed on the card
+        time_label_format: strftime format for the chart's time labels
+        asset_dir: Directory containing ton.png
+        image_format: Card format, see encoding.IMAGE_FORMATS
+        quality: JPEG/WebP quality
+        compress_level: PNG zlib level
+
+    Returns:
+        Encoded card, or None if the chart could not be generated
+    """
+    # Drawn at the size it has on the card, so it is pasted without resampling
+    chart_image = generate_chart_image(
+        CHART_SIZE[0],
+        CHART_SIZE[1],
+        price_data,
+        time_label_format=time_label_format
+    )
+    if chart_image is None:
+        return None
+
+    card = draw_card(
+        gift_name=gift_name,
+        price_stars=price_stars,
+        chart_img=chart_image,
+        dt=dt,
+        percent_change=percent_change,
+        asset_dir=asset_dir
+    )
+    return encode_image(card, image_format, quality, compress_level)
+
+def _warm_up() -> None:
+    """Build the card templates, load cached gift art and render one throwaway card so nothing is loaded lazily on a real request"""
+    warm_card_templates(ASSET_DIR)
+    preload_gift_images(get_catalog().ids, GIFT_IMAGE_SIZE)
+    now = datetime.now(timezone.utc)
+    price_data: List[PriceData] = [
+        {"priceUsd": 10.0 + i % 3, "listed_at": (now - timedelta(minutes=10 - i)).strftime(DATE_FORMAT)}
+        for i in range(10)
+    ]
+    # An unknown gift name keeps the warm-up off the network
+    render_card("", price_data, 0, 0.0, now)
+
+def _init_worker() -> None:
+    try:
+        _warm_up()
+    except Exception as e:
+        print(f"Error warming up render worker: {e}")
+
+class CardRenderer:
+    """
+    Renders cards off the event loop.
+
+    Cards are rendered in a warm process pool so rendering scales with cores
+    and never blocks message handling. With workers=0 cards are rendered in
+    a thread instead, for single-core hosts and debugging. Every card is
+    encoded with the same format and quality settings.
+    """
+
+    def __init__(
+        self,
+        workers: int = RENDER_WORKERS,
+        start_method: str = START_METHOD,
+        image_format: str = DEFAULT_IMAGE_FORMAT,
+        quality: int = DEFAULT_QUALITY,
+        compress_level: int = DEFAULT_PNG_COMPRESS_LEVEL,
+    ):
+        self.workers = workers
+        self.start_method = start_method
+        self.image_format = image_format
+        self.quality = quality
+        self.compress_level = compress_level
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def start(self) -> None:
+        """Start the worker processes and wait until each has warmed up"""
+        if self.workers <= 0 or self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+        )
+        # Workers start on demand; one task per worker starts them all now
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, os.getpid) for _ in range(self.workers)))
+
+    async def stop(self) -> None:
+        """Shut the worker processes down"""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+
+    async def render_card(
+        self,
+        gift_name: str,
+        price_data: List[PriceData],
+        price_stars: int,
+        percent_change: float,
+        dt: datetime,
+        time_label_format: str = TIME_LABEL_FORMAT,
+    ) -> Optional[bytes]:
+        """Render and encode a card without blocking the event loop (see render_card)"""
+        args = (
+            gift_name, price_data, price_stars, percent_change, dt, time_label_format,
+            ASSET_DIR, self.image_format, self.quality, self.compress_level,
+        )
+        if self._pool is None:
+            return await asyncio.to_thread(render_card, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, render_card, *args)
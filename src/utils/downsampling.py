@@ -0,0 +1,133 @@
+import numpy as np
+from typing import Callable, Dict
+
+from src.utils.price_series import PriceSeries, sample_series
+
+# ----- Type Aliases -----
+Downsampler = Callable[[PriceSeries, int], PriceSeries]
+
+# ----- Constants -----
+DEFAULT_METHOD = "lttb"
+
+def stride(series: PriceSeries, max_points: int) -> PriceSeries:
+    """Take every n-th point; cheap but drops spikes and ignores time spacing"""
+    return sample_series(series, max_points)
+
+def lttb(series: PriceSeries, max_points: int) -> PriceSeries:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    
+    Keeps the first and last points and, from each of the max_points - 2
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket. Bucket averages
+    come from cumulative sums and each bucket is scored as one array
+    operation, so the total work is O(n).
+    
+    Args:
+        series: Time-sorted price series
+        max_points: Maximum number of points to keep
+        
+    Returns:
+        Downsampled price series
+    """
+    timestamps, prices = series
+    n = len(timestamps)
+    if n <= max_points:
+        return series
+    if max_points < 3:
+        return stride(series, max_points)
+
+    x = (timestamps - timestamps[0]).astype(np.float64)
+    y = prices
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+
+    # Bucket i spans [edges[i], edges[i + 1]); the last "bucket" is the final point
+    edges = np.append(np.floor(np.linspace(1, n - 1, max_points - 1)).astype(np.int64), n)
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2]
+        count = next_hi - next_lo
+        avg_x = (sum_x[next_hi] - sum_x[next_lo]) / count
+        avg_y = (sum_y[next_hi] - sum_y[next_lo]) / count
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return timestamps[selected], prices[selected]
+
+def _first_per_bucket(mask: np.ndarray, buckets: np.ndarray) -> np.ndarray:
+    """Index of the first True value of mask in each bucket of a sorted bucket array"""
+    indices = np.flatnonzero(mask)
+    owners = buckets[indices]
+    first = np.concatenate(([True], owners[1:] != owners[:-1]))
+    return indices[first]
+
+def minmax_buckets(series: PriceSeries, max_points: int) -> PriceSeries:
+    """
+    Fixed-time-bucket min/max downsampling.
+    
+    Splits the time span into max_points // 2 equal buckets and keeps the
+    lowest and highest listing of every non-empty bucket in time order, so
+    spikes always survive. Runs in O(n) using segmented reductions.
+    
+    Args:
+        series: Time-sorted price series
+        max_points: Maximum number of points to keep
+        
+    Returns:
+        Downsampled price series
+    """
+    timestamps, prices = series
+    n = len(timestamps)
+    if n <= max_points:
+        return series
+    if max_points < 2:
+        # A bucket keeps two points, so a single point falls back to stride
+        return stride(series, max_points)
+    num_buckets = max_points // 2
+
+    span = int(timestamps[-1] - timestamps[0]) + 1
+    buckets = ((timestamps - timestamps[0]) * num_buckets // span).astype(np.int64)
+
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    counts = np.diff(np.append(starts, n))
+    bucket_min = np.repeat(np.minimum.reduceat(prices, starts), counts)
+    bucket_max = np.repeat(np.maximum.reduceat(prices, starts), counts)
+
+    selected = np.union1d(
+        _first_per_bucket(prices == bucket_min, buckets),
+        _first_per_bucket(prices == bucket_max, buckets)
+    )
+    return timestamps[selected], prices[selected]
+
+DOWNSAMPLERS: Dict[str, Downsampler] = {
+    "stride": stride,
+    "lttb": lttb,
+    "minmax": minmax_buckets,
+}
+
+def downsample(series: PriceSeries, max_points: int, method: str = DEFAULT_METHOD) -> PriceSeries:
+    """
+    Reduce a time-sorted price series to at most max_points points.
+    
+    Args:
+        series: Time-sorted price series
+        max_points: Maximum number of points to keep
+        method: Name of a registered downsampler ("stride", "lttb" or "minmax")
+        
+    Returns:
+        Downsampled price series
+        
+    Raises:
+        ValueError: If the method is not registered
+    """
+    downsampler = DOWNSAMPLERS.get(method)
+    if downsampler is None:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return downsampler(series, max_points)
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+# ----- Constants -----
+GIFTS_JSON_DEFAULT_PATH = "src/config/gifts.json"
+RELOAD_CHECK_SECONDS = 5
+
+def normalize_gift_name(name: str) -> str:
+    """Lookup key for a gift name: case, surrounding and repeated spaces and apostrophe style are ignored"""
+    return " ".join(name.replace("’", "'").lower().split())
+
+class GiftCatalog:
+    """
+    Immutable index of every gift collection.
+
+    Built once from gifts.json ({gift_id: name}) with O(1) lookups by ID and
+    by normalized name. Instances are never modified; a reload builds a new
+    catalog, so a reference held during a request stays consistent.
+    """
+
+    __slots__ = ("_names_by_id", "_ids_by_name", "_names_by_key")
+
+    def __init__(self, gifts: Mapping[str, str]):
+        self._names_by_id: Mapping[str, str] = MappingProxyType(dict(gifts))
+        self._ids_by_name: Mapping[str, str] = MappingProxyType({
+            normalize_gift_name(name): gift_id for gift_id, name in gifts.items()
+        })
+        self._names_by_key: Mapping[str, str] = MappingProxyType({
+            normalize_gift_name(name): name for name in gifts.values()
+        })
+
+    @classmethod
+    def load(cls, path: str = GIFTS_JSON_DEFAULT_PATH) -> "GiftCatalog":
+        """Load a catalog from a gifts JSON file"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @property
+    def ids(self) -> Tuple[str, ...]:
+        """Every gift ID"""
+        return tuple(self._names_by_id)
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """Every gift name as written in the catalog"""
+        return tuple(self._names_by_id.values())
+
+    def get_id(self, name: str) -> Optional[str]:
+        """Get a gift's ID by name, or None if unknown"""
+        return self._ids_by_name.get(normalize_gift_name(name))
+
+    def get_name(self, gift_id: str) -> Optional[str]:
+        """Get a gift's name by ID, or None if unknown"""
+        return self._names_by_id.get(gift_id)
+
+    def canonical_name(self, name: str) -> Optional[str]:
+        """Get the catalog spelling of a gift name, or None if unknown"""
+        return self._names_by_key.get(normalize_gift_name(name))
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and normalize_gift_name(name) in self._names_by_key
+
+    def __len__(self) -> int:
+        return len(self._names_by_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names_by_id.values())
+
+# Loaded catalogs by path: (catalog, file mtime, monotonic time of the last mtime check)
+_catalogs: Dict[str, Tuple[GiftCatalog, float, float]] = {}
+_lock = threading.Lock()
+
+def get_catalog(path: str = GIFTS_JSON_DEFAULT_PATH) -> GiftCatalog:
+    """
+    Get the shared catalog for a gifts JSON file.
+
+    The file is loaded once and reloaded when its modification time changes,
+    checked at most every RELOAD_CHECK_SECONDS. If the file is missing or a
+    changed file cannot be parsed, the previous catalog is kept.
+    """
+    now = time.monotonic()
+    entry = _catalogs.get(path)
+    if entry is not None and now - entry[2] < RELOAD_CHECK_SECONDS:
+        return entry[0]
+
+    with _lock:
+        entry = _catalogs.get(path)
+        try:
+            # The file may be briefly missing while an editor replaces it
+            mtime = os.stat(path).st_mtime
+            if entry is not None and entry[1] == mtime:
+                _catalogs[path] = (entry[0], mtime, now)
+                return entry[0]
+            catalog = GiftCatalog.load(path)
+        except (OSError, ValueError) as e:
+            if entry is None:
+                raise
+            print(f"Error reloading gift catalog {path}, keeping the previous one: {e}")
+            _catalogs[path] = (entry[0], entry[1], now)
+            return entry[0]
+        _catalogs[path] = (catalog, mtime, now)
+        return catalog
@@ -1,15 +1,25 @@
-import json
+import asyncio
+import os
 import requests
+from curl_cffi.requests import AsyncSession
 from io import BytesIO
+from typing import Dict, Iterable, Optional, Tuple
 from PIL import Image
 
+from src.utils.gift_catalog import GIFTS_JSON_DEFAULT_PATH, get_catalog
+
 # ----- Constants -----
-GIFTS_JSON_DEFAULT_PATH = "src/config/gifts.json"
 GIFT_IMAGE_API_URL = "https://api.changes.tg/original/{}.png"
+GIFT_IMAGE_CACHE_DIR = "cache/gift_images"
+GIFT_IMAGE_TIMEOUT = 10
+PREFETCH_CONCURRENCY = 8
+
+# Resized gift images by (gift_id, size), filled from the disk cache
+_resized_images: Dict[Tuple[str, Tuple[int, int]], Image.Image] = {}
 
 def get_gift_id_by_name(gift_name: str, gifts_json_path: str = GIFTS_JSON_DEFAULT_PATH) -> str | None:
     """
-    Find gift ID by its name in the gifts JSON file.
+    Find gift ID by its name in the gift catalog.
     
     Args:
         gift_name: Name of the gift to search for
@@ -18,25 +28,167 @@ def get_gift_id_by_name(gift_name: str, gifts_json_path: str = GIFTS_JSON_DEFAUL
     Returns:
         Gift ID if found, None otherwise
     """
-    with open(gifts_json_path, "r", encoding="utf-8") as f:
-        gifts = json.load(f)
-    for gid, name in gifts.items():
-        if name.lower() == gift_name.lower():
-            return gid
-    return None
+    return get_catalog(gifts_json_path).get_id(gift_name)
+
+def _cache_path(gift_id: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"{gift_id}.png")
+
+def _is_cached(gift_id: str, cache_dir: str) -> bool:
+    try:
+        return os.path.getsize(_cache_path(gift_id, cache_dir)) > 0
+    except OSError:
+        return False
+
+def _decode_image(content: bytes) -> Optional[Image.Image]:
+    """Decode image bytes, or return None if they are not a valid image"""
+    try:
+        image = Image.open(BytesIO(content))
+        image.load()
+        return image.convert("RGBA")
+    except Exception:
+        return None
+
+def _store_original(gift_id: str, content: bytes, cache_dir: str) -> None:
+    # Written to a temporary file first so a crash never leaves a partial image
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(gift_id, cache_dir)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def load_cached_gift_image(gift_id: str, cache_dir: str = GIFT_IMAGE_CACHE_DIR) -> Optional[Image.Image]:
+    """
+    Load a gift's original image from the disk cache.
+    
+    Args:
+        gift_id: ID of the gift
+        cache_dir: Directory of cached originals
+        
+    Returns:
+        PIL Image, or None if it is not cached; a corrupt file is deleted
+    """
+    path = _cache_path(gift_id, cache_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        image = _decode_image(f.read())
+    if image is None:
+        print(f"Removing corrupt cached gift image: {path}")
+        os.remove(path)
+    return image
 
-def fetch_gift_image_by_id(gift_id: str) -> Image.Image | None:
+def fetch_gift_image_by_id(gift_id: str, cache_dir: str = GIFT_IMAGE_CACHE_DIR) -> Image.Image | None:
     """
-    Fetch gift image from the API by its ID.
+    Get a gift's original image from the disk cache, downloading it on a miss.
     
     Args:
         gift_id: ID of the gift to fetch
+        cache_dir: Directory of cached originals
         
     Returns:
         PIL Image if successful, None otherwise
     """
+    image = load_cached_gift_image(gift_id, cache_dir)
+    if image is not None:
+        return image
+
     url = GIFT_IMAGE_API_URL.format(gift_id)
-    response = requests.get(url)
-    if response.status_code == 200:
-        return Image.open(BytesIO(response.content)).convert("RGBA")
-    return None
+    try:
+        response = requests.get(url, timeout=GIFT_IMAGE_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Error fetching gift image {gift_id}: {e}")
+        return None
+    if response.status_code != 200:
+        return None
+    image = _decode_image(response.content)
+    if image is not None:
+        _store_original(gift_id, response.content, cache_dir)
+    return image
+
+def get_gift_image(
+    gift_id: str,
+    size: Tuple[int, int],
+    cache_dir: str = GIFT_IMAGE_CACHE_DIR
+) -> Optional[Image.Image]:
+    """
+    Get a gift image resized to size, from memory, disk or the network in that order.
+    
+    Args:
+        gift_id: ID of the gift
+        size: Target (width, height)
+        cache_dir: Directory of cached originals
+        
+    Returns:
+        Shared resized PIL Image (do not modify it), or None if unavailable
+    """
+    key = (gift_id, size)
+    image = _resized_images.get(key)
+    if image is None:
+        original = fetch_gift_image_by_id(gift_id, cache_dir)
+        if original is None:
+            return None
+        image = _resized_images[key] = original.resize(size)
+    return image
+
+def preload_gift_images(
+    gift_ids: Iterable[str],
+    size: Tuple[int, int],
+    cache_dir: str = GIFT_IMAGE_CACHE_DIR
+) -> int:
+    """
+    Fill the in-memory tier from the disk cache without touching the network.
+    
+    Returns:
+        Number of gift images now held in memory at this size
+    """
+    loaded = 0
+    for gift_id in gift_ids:
+        key = (gift_id, size)
+        if key not in _resized_images:
+            original = load_cached_gift_image(gift_id, cache_dir)
+            if original is None:
+                continue
+            _resized_images[key] = original.resize(size)
+        loaded += 1
+    return loaded
+
+async def prefetch_gift_images(
+    gift_ids: Iterable[str],
+    cache_dir: str = GIFT_IMAGE_CACHE_DIR,
+    concurrency: int = PREFETCH_CONCURRENCY
+) -> int:
+    """
+    Download every gift image missing from the disk cache, concurrently.
+    
+    Args:
+        gift_ids: IDs of the gifts, e.g. every key of gifts.json
+        cache_dir: Directory of cached originals
+        concurrency: Maximum number of downloads at once
+        
+    Returns:
+        Number of images downloaded
+    """
+    # Only existence is checked here; a corrupt file is found and removed by
+    # the worker that loads it, and downloaded again on demand
+    missing = [gift_id for gift_id in gift_ids if not _is_cached(gift_id, cache_dir)]
+    if not missing:
+        return 0
+
+    semaphore = asyncio.Semaphore(concurrency)
+    async with AsyncSession(timeout=GIFT_IMAGE_TIMEOUT) as session:
+        async def download(gift_id: str) -> bool:
+            async with semaphore:
+                try:
+                    response = await session.get(GIFT_IMAGE_API_URL.format(gift_id))
+                except Exception as e:
+                    print(f"Error fetching gift image {gift_id}: {e}")
+                    return False
+            if response.status_code != 200 or _decode_image(response.content) is None:
+                print(f"Error fetching gift image {gift_id}: status_code: {response.status_code}")
+                return False
+            await asyncio.to_thread(_store_original, gift_id, response.content, cache_dir)
+            return True
+
+        results = await asyncio.gather(*(download(gift_id) for gift_id in missing))
+    return sum(results)
@@ -0,0 +1,111 @@
+import numpy as np
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+# ----- Type Aliases -----
+# Columnar price series: (listed_at in epoch milliseconds as int64, prices as float64)
+PriceSeries = Tuple[np.ndarray, np.ndarray]
+
+# ----- Constants -----
+LISTED_AT_FORMATS = ("%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%SZ")
+
+def empty_series() -> PriceSeries:
+    """Create an empty price series"""
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+def parse_listed_at_ms(listed_at: str) -> int:
+    """
+    Convert a single listed_at timestamp to epoch milliseconds.
+    
+    Args:
+        listed_at: UTC timestamp with or without a fractional second part
+        
+    Returns:
+        Epoch milliseconds
+        
+    Raises:
+        ValueError: If the timestamp matches none of the known formats
+    """
+    for date_format in LISTED_AT_FORMATS:
+        try:
+            dt = datetime.strptime(listed_at, date_format).replace(tzinfo=timezone.utc)
+            return int(dt.timestamp() * 1000)
+        except ValueError:
+            continue
+    raise ValueError(f"time data {listed_at!r} does not match any listed_at format")
+
+def _to_datetime64(listed_at: List[str]) -> np.ndarray:
+    # NumPy parses ISO 8601 with or without fractions, but not the trailing Z
+    return np.array([value[:-1] if value.endswith("Z") else value for value in listed_at], dtype="datetime64[ms]")
+
+def _drop_missing_prices(series: PriceSeries) -> PriceSeries:
+    # A null price converts to NaN in a float array instead of failing
+    timestamps, prices = series
+    valid = np.isfinite(prices)
+    if valid.all():
+        return series
+    print(f"Error processing data point: dropped {int((~valid).sum())} listings without a price")
+    return timestamps[valid], prices[valid]
+
+def parse_market_activity(results: List[Dict[str, Any]]) -> PriceSeries:
+    """
+    Turn a marketActivity response into timestamp and price columns.
+    
+    Fields are pulled out once and converted as whole arrays; only when a
+    batch contains a malformed point are items converted one by one so the
+    bad ones can be dropped. Listings with a null or non-finite price are
+    dropped either way.
+    
+    Args:
+        results: List of activity items with listed_at and price fields
+        
+    Returns:
+        Tuple of (listed_at epoch ms int64 array, price float64 array) in response order
+    """
+    try:
+        listed_at = [str(item["listed_at"]) for item in results]
+        prices = [item["price"] for item in results]
+        return _drop_missing_prices((_to_datetime64(listed_at).astype(np.int64), np.array(prices, dtype=np.float64)))
+    except (ValueError, KeyError, TypeError):
+        pass
+
+    timestamps: List[int] = []
+    valid_prices: List[float] = []
+    for item in results:
+        try:
+            timestamp = parse_listed_at_ms(str(item["listed_at"]))
+            price = float(item["price"])
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Error processing data point: {e}")
+            continue
+        timestamps.append(timestamp)
+        valid_prices.append(price)
+    return _drop_missing_prices((np.array(timestamps, dtype=np.int64), np.array(valid_prices, dtype=np.float64)))
+
+def window_series(series: PriceSeries, start_ms: int, end_ms: int) -> PriceSeries:
+    """Keep the points between two epoch ms timestamps, sorted by time"""
+    timestamps, prices = series
+    mask = (timestamps >= start_ms) & (timestamps <= end_ms)
+    timestamps, prices = timestamps[mask], prices[mask]
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], prices[order]
+
+def sample_series(series: PriceSeries, max_points: int) -> PriceSeries:
+    """Reduce a time-sorted series to at most max_points by taking every n-th point"""
+    timestamps, prices = series
+    if len(timestamps) <= max_points:
+        return series
+    if max_points <= 0:
+        return empty_series()
+    step = len(timestamps) // max_points
+    indices = np.arange(0, len(timestamps), step)[:max_points]
+    return timestamps[indices], prices[indices]
+
+def series_to_history(series: PriceSeries) -> List[Dict[str, Any]]:
+    """Convert a price series to the list of {priceUsd, listed_at} points used by the charts"""
+    timestamps, prices = series
+    listed_at = np.datetime_as_string(timestamps.astype("datetime64[ms]"), unit="us")
+    return [
+        {"priceUsd": price, "listed_at": f"{value}Z"}
+        for value, price in zip(listed_at.tolist(), prices.tolist())
+    ]
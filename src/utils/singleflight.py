@@ -0,0 +1,39 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+    
+    The first caller for a key starts the call; callers arriving while it is
+    in flight await the same result (or exception). The key is released as
+    soon as the call finishes, so later callers start a fresh one.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Check whether a call for a key is currently running"""
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn for a key unless a call for the same key is already running.
+        
+        Args:
+            key: Hashable key identifying the call
+            fn: Zero-argument coroutine function performing the call
+            
+        Returns:
+            Result of the shared call
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shielded so one cancelled caller does not cancel the call for the others
+        return await asyncio.shield(future)
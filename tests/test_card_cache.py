@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from src.bot.card_cache import CardCache
+
+def test_followers_upload_themselves_when_the_first_upload_fails():
+    async def scenario():
+        cache = CardCache()
+        started = asyncio.Event()
+        uploads = []
+
+        async def failing_upload():
+            uploads.append("leader")
+            started.set()
+            await asyncio.sleep(0.01)
+            raise RuntimeError("chat not found")
+
+        async def follower_upload():
+            uploads.append("follower")
+            return "file-id"
+
+        leader = asyncio.create_task(cache.get_or_upload("key", failing_upload))
+        await started.wait()
+        follower = await cache.get_or_upload("key", follower_upload)
+        with pytest.raises(RuntimeError):
+            await leader
+        return follower, uploads, cache.get("key")
+
+    assert asyncio.run(scenario()) == ("file-id", ["leader", "follower"], "file-id")
+
+def test_followers_share_a_successful_upload():
+    async def scenario():
+        cache = CardCache()
+        calls = []
+
+        async def upload():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "file-id"
+
+        results = await asyncio.gather(*(cache.get_or_upload("key", upload) for _ in range(3)))
+        return results, len(calls)
+
+    assert asyncio.run(scenario()) == (["file-id"] * 3, 1)
+
+def test_pop_forgets_a_file_id():
+    async def scenario():
+        cache = CardCache()
+
+        async def upload():
+            return "old"
+
+        await cache.get_or_upload("key", upload)
+        cache.pop("key")
+        return cache.get("key")
+
+    assert asyncio.run(scenario()) is None
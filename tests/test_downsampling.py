@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from src.utils.downsampling import DOWNSAMPLERS, downsample
+from src.utils.price_series import sample_series
+
+def _series(n: int):
+    timestamps = np.arange(n, dtype=np.int64) * 60_000
+    prices = 10 + np.sin(np.arange(n) / 7.0)
+    return timestamps, prices
+
+@pytest.mark.parametrize("method", sorted(DOWNSAMPLERS))
+@pytest.mark.parametrize("max_points", [0, 1, 2, 3, 80])
+def test_never_returns_more_than_max_points(method, max_points):
+    timestamps, prices = downsample(_series(1000), max_points, method)
+    assert len(timestamps) == len(prices)
+    assert len(timestamps) <= max_points
+
+@pytest.mark.parametrize("method", sorted(DOWNSAMPLERS))
+def test_single_point_keeps_the_first(method):
+    timestamps, _ = downsample(_series(1000), 1, method)
+    assert timestamps.tolist() == [0]
+
+@pytest.mark.parametrize("method", sorted(DOWNSAMPLERS))
+def test_short_series_is_unchanged(method):
+    series = _series(5)
+    timestamps, _ = downsample(series, 80, method)
+    assert timestamps.tolist() == series[0].tolist()
+
+def test_sample_series_with_zero_points_is_empty():
+    timestamps, prices = sample_series(_series(10), 0)
+    assert len(timestamps) == 0 and len(prices) == 0
@@ -0,0 +1,13 @@
+import json
+
+from src.utils import gift_catalog
+
+def test_missing_file_keeps_previous_catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(gift_catalog, "RELOAD_CHECK_SECONDS", 0)
+    path = tmp_path / "gifts.json"
+    path.write_text(json.dumps({"1": "Plush Pepe"}))
+    catalog = gift_catalog.get_catalog(str(path))
+
+    path.unlink()
+    assert gift_catalog.get_catalog(str(path)) is catalog
+    assert catalog.get_id("plush pepe") == "1"
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import numpy as np
+
+from src.api import ingestion
+from src.database import database
+
+PAGE_SIZE = 100
+# One listing every 10 minutes over the last 30 days, newest first
+NOW_MS = int(time.time() * 1000)
+LISTINGS = np.arange(NOW_MS - 60_000, NOW_MS - 30 * 24 * 3600 * 1000, -600_000, dtype=np.int64)
+
+def _use_fake_portals(tmp_path, monkeypatch) -> list:
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "bot.db"))
+    monkeypatch.setattr(ingestion, "_last_ingested", {})
+    database.init_db()
+    fetched = []
+
+    async def stream_listings(gift_name, auth_data, since_ms, client, first_page_size):
+        for offset in range(0, len(LISTINGS), PAGE_SIZE):
+            page = LISTINGS[offset:offset + PAGE_SIZE]
+            inside = page[page >= since_ms]
+            fetched.extend(inside.tolist())
+            if len(inside):
+                yield inside, np.full(len(inside), 10.0)
+            if len(inside) < len(page):
+                return
+
+    monkeypatch.setattr(ingestion, "stream_listings", stream_listings)
+    return fetched
+
+def _hour_rollup_count() -> int:
+    rollups = database.get_rollups("Plush Pepe", ingestion.HOUR_ROLLUP, 0, NOW_MS)
+    return sum(count for *_, count in rollups)
+
+def test_cold_gift_only_backfills_the_requested_range(tmp_path, monkeypatch):
+    fetched = _use_fake_portals(tmp_path, monkeypatch)
+
+    asyncio.run(ingestion.ingest_listings("Plush Pepe", "auth", object(), hours=12))
+
+    assert min(fetched) >= NOW_MS - 13 * 3600 * 1000
+    assert ingestion.is_covered("Plush Pepe", 12)
+    assert not ingestion.is_covered("Plush Pepe", 24)
+
+def test_longer_range_extends_the_backfill_without_counting_twice(tmp_path, monkeypatch):
+    fetched = _use_fake_portals(tmp_path, monkeypatch)
+
+    async def scenario() -> int:
+        await ingestion.ingest_listings("Plush Pepe", "auth", object(), hours=12)
+        await ingestion.ingest_listings("Plush Pepe", "auth", object(), hours=7 * 24)
+        fetched.clear()
+        return await ingestion.ingest_listings("Plush Pepe", "auth", object(), hours=7 * 24)
+
+    assert asyncio.run(scenario()) == 1
+    # Only the newest listing, re-read at the watermark, is fetched again
+    assert fetched == [int(LISTINGS[0])]
+    assert ingestion.is_covered("Plush Pepe", 7 * 24)
+    assert _hour_rollup_count() == int((LISTINGS >= NOW_MS - 7 * 24 * 3600 * 1000).sum())
+
+def test_watermark_without_coverage_starts_over(tmp_path, monkeypatch):
+    fetched = _use_fake_portals(tmp_path, monkeypatch)
+    # A store written before coverage was tracked, holding only the last 12 hours
+    legacy = [(int(ts), 10.0) for ts in LISTINGS[LISTINGS >= NOW_MS - 12 * 3600 * 1000]]
+    database.store_listings("Plush Pepe", legacy, legacy[0][0], list(ingestion.ROLLUP_RETENTION_HOURS))
+
+    asyncio.run(ingestion.ingest_listings("Plush Pepe", "auth", object(), hours=7 * 24))
+
+    assert min(fetched) < NOW_MS - 6 * 24 * 3600 * 1000
+    assert ingestion.is_covered("Plush Pepe", 7 * 24)
+    assert _hour_rollup_count() == int((LISTINGS >= NOW_MS - 7 * 24 * 3600 * 1000).sum())
@@ -0,0 +1,39 @@
+import sqlite3
+import time
+
+from src.api import ingestion
+from src.database import database
+
+def _use_db(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "bot.db"))
+    database.init_db()
+
+def test_change_is_against_the_floor_from_the_start_of_the_window(tmp_path, monkeypatch):
+    _use_db(tmp_path, monkeypatch)
+    database.store_current_prices({"Plush Pepe": 100.0, "Crystal Ball": 10.0})
+    # Age the first sweep past the change window
+    day_ago = time.time() - ingestion.OVERVIEW_CHANGE_HOURS * 3600
+    with sqlite3.connect(database.DB_PATH) as conn:
+        conn.execute("UPDATE floor_history SET recorded_at = ?", (day_ago - 60,))
+    database.store_current_price("Plush Pepe", 110.0)
+
+    overview = ingestion.market_overview(["Plush Pepe", "Crystal Ball"])
+
+    assert overview[0][0] == "Plush Pepe"
+    assert overview[0][1] == 110.0
+    assert round(overview[0][2], 6) == 10.0
+    assert overview[1] == ("Crystal Ball", 10.0, 0.0)
+
+def test_change_is_unknown_without_an_old_enough_floor(tmp_path, monkeypatch):
+    _use_db(tmp_path, monkeypatch)
+    database.store_current_price("Plush Pepe", 100.0)
+
+    assert ingestion.market_overview(["Plush Pepe"]) == [("Plush Pepe", 100.0, None)]
+
+def test_prune_floor_history_keeps_the_current_floor(tmp_path, monkeypatch):
+    _use_db(tmp_path, monkeypatch)
+    database.store_current_price("Plush Pepe", 100.0)
+    database.prune_floor_history(time.time() + 1)
+
+    assert database.get_past_floors(time.time() + 1) == {}
+    assert database.get_current_prices()["Plush Pepe"][0] == 100.0
@@ -0,0 +1,21 @@
+import numpy as np
+
+from src.utils.price_series import parse_market_activity
+
+def test_null_price_is_dropped_with_its_timestamp():
+    timestamps, prices = parse_market_activity([
+        {"listed_at": "2024-01-01T00:00:00.000Z", "price": "10.5"},
+        {"listed_at": "2024-01-01T00:01:00.000Z", "price": None},
+        {"listed_at": "2024-01-01T00:02:00.000Z", "price": "11"},
+    ])
+    assert prices.tolist() == [10.5, 11.0]
+    assert timestamps.tolist() == [1704067200000, 1704067320000]
+    assert np.isfinite(prices).all()
+
+def test_missing_price_is_dropped():
+    timestamps, prices = parse_market_activity([
+        {"listed_at": "2024-01-01T00:00:00Z", "price": "10"},
+        {"listed_at": "2024-01-01T00:01:00Z"},
+    ])
+    assert prices.tolist() == [10.0]
+    assert timestamps.tolist() == [1704067200000]
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from src.api.resilience import AIMDLimiter, CircuitBreaker, CircuitOpenError, UpstreamGuard
+
+def _half_open_guard() -> UpstreamGuard:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    limiter = AIMDLimiter(initial_limit=1, min_limit=1, max_limit=1)
+    return UpstreamGuard(breaker=breaker, limiter=limiter, attempts=1)
+
+def test_cancel_while_waiting_for_limiter_keeps_probe_available():
+    async def scenario() -> str:
+        guard = _half_open_guard()
+        assert guard.breaker.state == "half_open"
+
+        async def ok() -> str:
+            return "ok"
+
+        # Hold the only slot so the call waits in the limiter
+        await guard.limiter.acquire()
+        waiting = asyncio.create_task(guard.call(ok))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        await guard.limiter.release(None)
+
+        return await guard.call(ok)
+
+    assert asyncio.run(scenario()) == "ok"
+
+def test_rejected_call_frees_its_limiter_slot():
+    async def scenario() -> int:
+        guard = _half_open_guard()
+        guard.breaker.reset_timeout = 60
+
+        async def ok() -> str:
+            return "ok"
+
+        with pytest.raises(CircuitOpenError):
+            await guard.call(ok)
+        return guard.limiter.in_flight
+
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timezone
+
+from src.api.api_client import stream_listings
+
+class FakeClient:
+    """Answers marketActivity with one listing per second, newest first"""
+
+    def __init__(self, newest_ms: int, count: int) -> None:
+        self.newest_ms = newest_ms
+        self.count = count
+        self.limits = []
+
+    async def market_activity(self, offset, limit, **kwargs):
+        self.limits.append(limit)
+        return [
+            {
+                "listed_at": datetime.fromtimestamp((self.newest_ms - i * 1000) / 1000, timezone.utc)
+                .strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z",
+                "price": "10",
+            }
+            for i in range(offset, min(offset + limit, self.count))
+        ]
+
+def _stream(client: FakeClient, since_ms: int) -> int:
+    async def scenario() -> int:
+        fetched = 0
+        async for timestamps, _ in stream_listings("Plush Pepe", "auth", since_ms, client, page_size=500):
+            fetched += len(timestamps)
+        return fetched
+
+    return asyncio.run(scenario())
+
+def test_recent_watermark_costs_one_small_page():
+    client = FakeClient(newest_ms=1_000_000_000, count=10_000)
+
+    assert _stream(client, since_ms=1_000_000_000 - 5_000) == 6
+    assert client.limits == [50]
+
+def test_pages_double_while_every_listing_is_new():
+    client = FakeClient(newest_ms=1_000_000_000, count=10_000)
+
+    assert _stream(client, since_ms=1_000_000_000 - 1_999_000) == 2000
+    assert client.limits == [50, 100, 200, 400, 500, 500, 500]